@@ -1,78 +1,171 @@
 import asyncio
-from typing import Dict, List, Any, Optional
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, ClassVar, Tuple
 from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
 from browser_tool import PlaywrightBrowserTool, PageInfo
 from config import Config
+from llm_cache import CachedChatOpenAI
+from json_utils import dumps_bytes, dumps_str
+from log_utils import configure_logging, is_logging_configured
 import json
+import logging
+import re
 from datetime import datetime
-import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Шаблоны для категоризации ссылок
+_SOCIAL_RE = re.compile(r"(?:facebook|twitter|instagram|linkedin|youtube|tiktok)\.com", re.IGNORECASE)
+_LOCAL_RE = re.compile(r"localhost|127\.0\.0\.1", re.IGNORECASE)
+_DOWNLOAD_SUFFIXES = ('.pdf', '.doc', '.docx', '.zip', '.rar')
+
+# Ключевые слова для категоризации форм
+_CONFIRM_TOKENS = ("confirm", "repeat")
+_SEARCH_TOKENS = ("search", "query")
+_MESSAGE_TOKENS = ("message", "comment")
+_FILTER_TOKENS = ("filter", "sort")
+_CART_TOKENS = ("add to basket", "add to cart", "buy", "basket", "cart")
+
+_SCHEME_RE = re.compile(r"^https?://")
+_WHITESPACE_RE = re.compile(r"\s+")
+_TIME_RE = re.compile(r"(\d+)(?:\s*-\s*(\d+))?")
+
+# Версия шаблонов промптов: входит в ключи кэша LLM, поэтому после правки текста
+# промпта ее нужно увеличить, иначе до истечения LLM_CACHE_TTL вернутся старые ответы
+_PROMPT_VERSION = 2
+
+# JSON mode OpenAI: ответ модели гарантированно является JSON-объектом
+_JSON_MODE = {"response_format": {"type": "json_object"}}
+
+# Статические инструкции для поиска багов. Вынесены в системное сообщение целиком,
+# чтобы префикс запроса был одинаковым для всех страниц (prompt caching у провайдера)
+_BUG_PROMPT_PREFIX = """You are a web testing expert. Find real problems and bugs.
+
+Analyze the web page described in the user message for potential bugs and issues.
+Find potential problems and return them as a JSON object:
+{
+    "bugs": [
+        {
+            "type": "issue_type",
+            "severity": "high/medium/low",
+            "description": "problem description",
+            "recommendation": "fix recommendation"
+        }
+    ]
+}
+If no problems are found, return exactly: {"bugs": []}
+
+Use only English language for all descriptions and recommendations."""
+
+def _rounded_load_time(page_info: PageInfo) -> Optional[float]:
+    """Время загрузки страницы с точностью до 0.1 с (для промптов и ключей кэша LLM)"""
+    return round(page_info.load_time, 1) if page_info.load_time is not None else None
+
+def _compact_text(text: str, limit: int) -> str:
+    """Схлопывает пробельные символы и обрезает текст до limit символов"""
+    return _WHITESPACE_RE.sub(" ", text[:limit * 2]).strip()[:limit]
+
+def _trim_prompt(prompt: str, max_chars: int, tail_chars: int = 500) -> str:
+    """Обрезает середину промпта, сохраняя начало и инструкции в конце"""
+    if len(prompt) <= max_chars:
+        return prompt
+    return prompt[:max_chars - tail_chars] + " …[trimmed]… " + prompt[-tail_chars:]
+
+@dataclass
+class PageStats:
+    """Производные данные страницы, вычисляемые один раз за анализ"""
+    forms_count: int
+    links_count: int
+    images_count: int
+    has_errors: bool
+    forms_analysis: Optional[Dict[str, Any]]
+    link_categories: Dict[str, List[str]]
+    content_snippet: str
 
 class WebAnalysisAgent:
     """Базовый агент для анализа веб-сайтов"""
     
+    # Системные сообщения одинаковы для всех страниц, поэтому создаются один раз
+    _SYS_COMBINED: ClassVar[SystemMessage] = SystemMessage(content="You are a web analysis expert and a senior QA engineer specializing in website-specific testing. Analyze sites thoroughly and suggest only tests that add real value. Respond in JSON. Use English only.")
+    _SYS_TESTCASES: ClassVar[SystemMessage] = SystemMessage(content="You are a senior QA engineer specializing in website-specific testing. Focus on unique functionality rather than generic tests. Be selective and only suggest tests that add real value. Respond in JSON.")
+    _SYS_BUGS: ClassVar[SystemMessage] = SystemMessage(content=_BUG_PROMPT_PREFIX)
+    
     def __init__(self):
         Config.validate()
-        self.llm = ChatOpenAI(
+        if not is_logging_configured():
+            configure_logging()
+        self.llm = CachedChatOpenAI(ChatOpenAI(
             temperature=0.1,
             api_key=Config.OPENAI_API_KEY,
             model="gpt-4o-mini"
-        )
-        self.browser_tool = PlaywrightBrowserTool()
+        ))
+        # Агент только читает DOM, поэтому картинки, шрифты и стили не загружаются
+        self.browser_tool = PlaywrightBrowserTool(block_resources=True)
         
     async def analyze_website(self, url: str) -> Dict[str, Any]:
         """Анализирует веб-сайт и возвращает подробный отчет"""
         
-        print(f"🔍 Начинаю анализ сайта: {url}")
+        logger.info("🔍 Начинаю анализ сайта: %s", url)
         
         async with self.browser_tool:
-            # Шаг 1: Загружаем главную страницу
+            # Загружаем главную страницу
             main_page = await self.browser_tool.navigate_to_page(url)
-            print(f"📄 Загружена главная страница: {main_page.title}")
-            
-            # Шаг 2: Анализируем структуру страницы с помощью AI
-            structure_analysis = await self._analyze_page_structure(main_page)
-            print("🏗️ Структура страницы проанализирована")
-            
-            # Шаг 3: Ищем потенциальные тест-кейсы
-            test_cases = await self._identify_test_cases(main_page)
-            print(f"🧪 Сгенерировано {len(test_cases)} тест-кейсов:")
+            logger.info("📄 Загружена главная страница: %s", main_page.title)
+            # Убираем повторы ссылок (меню, футер), сохраняя порядок
+            main_page.links = list(dict.fromkeys(main_page.links))
             
-            # Выводим краткую статистику по тест-кейсам
-            high_priority = len([tc for tc in test_cases if tc.get("priority") == "high"])
-            medium_priority = len([tc for tc in test_cases if tc.get("priority") == "medium"])
-            low_priority = len([tc for tc in test_cases if tc.get("priority") == "low"])
-            
-            print(f"   📊 Приоритеты: {high_priority} высокий, {medium_priority} средний, {low_priority} низкий")
+            # Анализ страницы, проверка ссылок и поиск багов независимы друг от друга,
+            # поэтому запускаются параллельно. Анализ структуры и AI тест-кейсы
+            # запрашиваются у LLM одним запросом
+            links_to_check = main_page.links[:10]
+            stats = self._compute_page_stats(main_page)
+            analysis_task = asyncio.create_task(self._analyze_and_generate(main_page, stats))
+            links_task = asyncio.create_task(self._check_links(links_to_check))
+            bugs_task = asyncio.create_task(self._identify_potential_bugs(main_page))
+
+            (structure_analysis, ai_test_cases), broken_links, potential_bugs = await asyncio.gather(
+                analysis_task, links_task, bugs_task
+            )
+            test_cases = await self._identify_test_cases(main_page, ai_test_cases, stats)
+
+            # Итоги: структура страницы и тест-кейсы
+            logger.info("🏗️ Структура страницы проанализирована")
+            logger.info("🧪 Сгенерировано %d тест-кейсов:", len(test_cases))
             
-            # Показываем типы тест-кейсов
+            # Собираем статистику по тест-кейсам за один проход
+            priority_counts = {"high": 0, "medium": 0, "low": 0}
             test_types = {}
+            form_test = None
             for tc in test_cases:
+                priority = tc.get("priority")
+                if priority in priority_counts:
+                    priority_counts[priority] += 1
                 tc_type = tc.get("type", "unknown")
                 test_types[tc_type] = test_types.get(tc_type, 0) + 1
+                if form_test is None and tc_type == "form_validation":
+                    form_test = tc
             
-            print(f"   🔍 Типы тестов: {', '.join([f'{k}({v})' for k, v in test_types.items()])}")
+            logger.info("   📊 Приоритеты: %d высокий, %d средний, %d низкий",
+                        priority_counts["high"], priority_counts["medium"], priority_counts["low"])
+            
+            # Показываем типы тест-кейсов
+            logger.info("   🔍 Типы тестов: %s", ", ".join(f"{k}({v})" for k, v in test_types.items()))
             
             # Если есть формы, показываем их анализ
-            if main_page.forms:
-                form_test = next((tc for tc in test_cases if tc.get("type") == "form_validation"), None)
-                if form_test and "forms_summary" in form_test:
-                    form_types = form_test["forms_summary"]["form_types"]
-                    if form_types:
-                        print(f"   📝 Типы форм: {', '.join([f'{k}({v})' for k, v in form_types.items()])}")
+            if main_page.forms and form_test and "forms_summary" in form_test:
+                form_types = form_test["forms_summary"]["form_types"]
+                if form_types:
+                    logger.info("   📝 Типы форм: %s", ", ".join(f"{k}({v})" for k, v in form_types.items()))
             
             total_time = self._calculate_total_testing_time(test_cases)
             if total_time != "0 minutes":
-                print(f"   ⏱️ Ориентировочное время тестирования: {total_time}")
-            
-            # Шаг 4: Проверяем ссылки (первые 10 для демо)
-            links_to_check = main_page.links[:10]
-            broken_links = await self._check_links(links_to_check)
-            print(f"🔗 Проверено {len(links_to_check)} ссылок, найдено {len(broken_links)} битых")
+                logger.info("   ⏱️ Ориентировочное время тестирования: %s", total_time)
             
-            # Шаг 5: Ищем потенциальные баги
-            potential_bugs = await self._identify_potential_bugs(main_page)
-            print(f"🐛 Найдено {len(potential_bugs)} потенциальных багов")
+            # Итоги проверки ссылок (первые 10 для демо) и поиска багов
+            logger.info("🔗 Проверено %d ссылок, найдено %d битых", len(links_to_check), len(broken_links))
+            logger.info("🐛 Найдено %d потенциальных багов", len(potential_bugs))
             
             # Формируем итоговый отчет
             report = {
@@ -82,18 +175,18 @@ class WebAnalysisAgent:
                     "title": main_page.title,
                     "status_code": main_page.status_code,
                     "load_time": main_page.load_time,
-                    "links_count": len(main_page.links),
-                    "images_count": len(main_page.images),
-                    "forms_count": len(main_page.forms)
+                    "links_count": stats.links_count,
+                    "images_count": stats.images_count,
+                    "forms_count": stats.forms_count
                 },
                 "structure_analysis": structure_analysis,
                 "test_cases": {
                     "summary": {
                         "total_test_cases": len(test_cases),
-                        "high_priority": len([tc for tc in test_cases if tc.get("priority") == "high"]),
-                        "medium_priority": len([tc for tc in test_cases if tc.get("priority") == "medium"]),
-                        "low_priority": len([tc for tc in test_cases if tc.get("priority") == "low"]),
-                        "estimated_total_time": self._calculate_total_testing_time(test_cases)
+                        "high_priority": priority_counts["high"],
+                        "medium_priority": priority_counts["medium"],
+                        "low_priority": priority_counts["low"],
+                        "estimated_total_time": total_time
                     },
                     "test_cases": test_cases
                 },
@@ -105,27 +198,69 @@ class WebAnalysisAgent:
             # Сохраняем отчет
             await self._save_report(report)
             
+            cache_stats = self.llm.stats()
+            logger.info("💾 Кэш LLM: %d попаданий, %d промахов", cache_stats["hits"], cache_stats["misses"])
+            
             return report
     
-    async def _analyze_page_structure(self, page_info: PageInfo) -> Dict[str, Any]:
-        """Анализирует структуру страницы с помощью AI"""
+    def _compute_page_stats(self, page_info: PageInfo) -> PageStats:
+        """Вычисляет производные данные страницы, которые используют несколько шагов анализа"""
+        
+        return PageStats(
+            forms_count=len(page_info.forms),
+            links_count=len(page_info.links),
+            images_count=len(page_info.images),
+            has_errors=bool(page_info.errors),
+            forms_analysis=self._analyze_forms(page_info.forms) if page_info.forms else None,
+            link_categories=self._categorize_links(page_info.links),
+            content_snippet=_compact_text(page_info.content, 2000)
+        )
+    
+    def _prompt_cache_key(self, task: str, system: SystemMessage, page_info: PageInfo, stats: PageStats) -> Dict[str, Any]:
+        """Легковесный ключ кэша LLM для задачи по странице
+        
+        Вычисляется без сборки промпта, поэтому при попадании в кэш тяжелая
+        сериализация не выполняется. Содержит все данные страницы, которые попадают
+        в промпты структуры и тест-кейсов, текст системного сообщения и версию
+        шаблонов (_PROMPT_VERSION). Время загрузки в промпте округлено до 0.1 с,
+        чтобы повторные запуски на том же URL попадали в кэш.
+        """
+        return {
+            "task": task,
+            "version": _PROMPT_VERSION,
+            "system": system.content,
+            "url": page_info.url,
+            "title": page_info.title,
+            "meta_tags": page_info.meta_tags,
+            "load_time": _rounded_load_time(page_info),
+            "counts": [stats.forms_count, stats.links_count, stats.images_count],
+            "has_errors": stats.has_errors,
+            "forms_summary": stats.forms_analysis["summary"] if stats.forms_analysis else {},
+            "content": stats.content_snippet
+        }
+    
+    def _build_structure_task(self, page_info: PageInfo, stats: PageStats) -> str:
+        """Формирует описание задачи анализа структуры страницы для LLM"""
         
-        prompt = f"""
+        # Вместо полного дампа форм передаем их сводку - она в разы короче
+        forms_summary = stats.forms_analysis["summary"] if stats.forms_analysis else {}
+        
+        task = f"""
         Analyze the structure of this web page and provide detailed assessment:
         
         URL: {page_info.url}
         Title: {page_info.title}
-        Links count: {len(page_info.links)}
-        Images count: {len(page_info.images)}
-        Forms count: {len(page_info.forms)}
+        Links count: {stats.links_count}
+        Images count: {stats.images_count}
+        Forms count: {stats.forms_count}
         
-        Meta tags: {json.dumps(page_info.meta_tags, ensure_ascii=False, indent=2)}
+        Meta tags: {dumps_str(page_info.meta_tags)}
         
         Page content (first 2000 characters):
-        {page_info.content[:2000]}
+        {stats.content_snippet}
         
-        Forms on page:
-        {json.dumps(page_info.forms, ensure_ascii=False, indent=2)}
+        Forms summary:
+        {dumps_str(forms_summary)}
         
         Analyze:
         1. Site type (e-commerce, blog, corporate site, etc.)
@@ -133,50 +268,111 @@ class WebAnalysisAgent:
         3. SEO quality (meta tags, structure)
         4. Accessibility issues
         5. Potential UX problems
+        """
+        return _trim_prompt(task, Config.MAX_PROMPT_CHARS)
+    
+    async def _analyze_and_generate(self, page_info: PageInfo, stats: Optional[PageStats] = None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Анализирует структуру страницы и генерирует AI тест-кейсы одним запросом к LLM
         
-        Respond in JSON format with keys: site_type, main_sections, seo_quality, accessibility_issues, ux_issues
-        Use only English language for all descriptions and analysis.
+        Ошибка запроса или некорректный ответ не прерывают анализ сайта: вместо
+        неудавшейся части возвращается пустой результат ({} или []).
         """
         
-        messages = [
-            SystemMessage(content="You are a web analysis and testing expert. Analyze sites thoroughly and professionally. Use English only."),
-            HumanMessage(content=prompt)
-        ]
+        stats = stats or self._compute_page_stats(page_info)
         
-        response = self.llm.invoke(messages)
+        def build_messages():
+            prompt = f"""
+            Complete the two tasks below for the same web page and return the results in a single JSON object.
+            
+            TASK "structure":
+            {self._build_structure_task(page_info, stats)}
+            
+            TASK "test_cases":
+            {self._build_test_cases_task(page_info, stats)}
+            
+            RESPONSE FORMAT - a JSON object with exactly two keys:
+            {{
+                "structure": {{
+                    "site_type": "...",
+                    "main_sections": "...",
+                    "seo_quality": "...",
+                    "accessibility_issues": "...",
+                    "ux_issues": "..."
+                }},
+                "test_cases": [test case objects in the format described in the "test_cases" task, or [] if none]
+            }}
+            
+            Use only English language for all descriptions and analysis.
+            """
+            
+            return (self._SYS_COMBINED, HumanMessage(content=prompt))
         
         try:
-            return json.loads(response.content)
+            response = await self.llm.ainvoke_lazy(
+                self._prompt_cache_key("structure_and_test_cases", self._SYS_COMBINED, page_info, stats), build_messages, **_JSON_MODE
+            )
+            result = json.loads(response.content)
         except json.JSONDecodeError:
-            return {"analysis": response.content, "format": "text"}
+            logger.warning("⚠️ Combined AI analysis returned invalid JSON")
+            return {}, []
+        except Exception as e:
+            logger.warning("⚠️ Combined AI analysis error: %s", e)
+            return {}, []
+        
+        if not isinstance(result, dict):
+            logger.warning("⚠️ Combined AI analysis returned invalid JSON")
+            return {}, []
+        
+        # Каждая часть ответа проверяется отдельно: некорректная часть не отменяет другую
+        structure_analysis = result.get("structure")
+        if not isinstance(structure_analysis, dict):
+            structure_analysis = {}
+        test_cases = result.get("test_cases")
+        if not isinstance(test_cases, list):
+            test_cases = []
+        ai_test_cases = [
+            case for case in test_cases
+            if isinstance(case, dict) and self._validate_test_case(case)
+        ]
+        
+        return structure_analysis, ai_test_cases
     
-    async def _identify_test_cases(self, page_info: PageInfo) -> List[Dict[str, Any]]:
-        """Определяет потенциальные тест-кейсы"""
+    async def _identify_test_cases(self, page_info: PageInfo, ai_test_cases: Optional[List[Dict[str, Any]]] = None,
+                                   stats: Optional[PageStats] = None) -> List[Dict[str, Any]]:
+        """Определяет потенциальные тест-кейсы
         
+        Если AI тест-кейсы уже получены (например, через _analyze_and_generate),
+        они передаются в ai_test_cases и повторный запрос к LLM не выполняется.
+        """
+        
+        stats = stats or self._compute_page_stats(page_info)
+        forms_count = stats.forms_count
+        links_count = stats.links_count
+        images_count = stats.images_count
         test_cases = []
         
         # Группируем тест-кейсы для форм в один комплексный тест
-        if page_info.forms:
-            form_details = self._analyze_forms(page_info.forms)
+        if stats.forms_analysis:
+            form_details = stats.forms_analysis
             
             test_cases.append({
                 "type": "form_validation",
-                "title": f"Forms Validation Testing ({len(page_info.forms)} forms)",
-                "description": f"Comprehensive validation testing for all {len(page_info.forms)} forms on the page",
+                "title": f"Forms Validation Testing ({forms_count} forms)",
+                "description": f"Comprehensive validation testing for all {forms_count} forms on the page",
                 "forms_summary": form_details["summary"],
                 "steps": self._generate_form_test_steps(form_details),
                 "priority": "high" if form_details["has_required_fields"] else "medium",
-                "estimated_time": f"{len(page_info.forms) * 5}-{len(page_info.forms) * 10} minutes",
+                "estimated_time": f"{forms_count * 5}-{forms_count * 10} minutes",
                 "forms_breakdown": form_details["breakdown"]
             })
         
         # Тест-кейсы для ссылок
-        if page_info.links:
-            link_categories = self._categorize_links(page_info.links)
+        if links_count:
+            link_categories = stats.link_categories
             test_cases.append({
                 "type": "navigation",
                 "title": "Navigation and Links Testing",
-                "description": f"Testing functionality of {len(page_info.links)} links across different categories",
+                "description": f"Testing functionality of {links_count} links across different categories",
                 "link_categories": link_categories,
                 "steps": [
                     "Test internal navigation links",
@@ -187,15 +383,15 @@ class WebAnalysisAgent:
                     "Ensure all links have proper target attributes"
                 ],
                 "priority": "high",
-                "estimated_time": f"{max(10, len(page_info.links) // 2)} minutes"
+                "estimated_time": f"{max(10, links_count // 2)} minutes"
             })
         
         # Тест-кейсы для изображений
-        if page_info.images:
+        if images_count:
             test_cases.append({
                 "type": "media",
                 "title": "Media Content and Accessibility Testing",
-                "description": f"Testing {len(page_info.images)} images for loading, accessibility, and responsiveness",
+                "description": f"Testing {images_count} images for loading, accessibility, and responsiveness",
                 "steps": [
                     "Verify all images load correctly",
                     "Check alt-text presence and quality",
@@ -204,7 +400,7 @@ class WebAnalysisAgent:
                     "Check lazy loading implementation if present"
                 ],
                 "priority": "medium",
-                "estimated_time": f"{len(page_info.images) // 2 + 5} minutes"
+                "estimated_time": f"{images_count // 2 + 5} minutes"
             })
         
         # Добавляем тест-кейсы для производительности
@@ -241,7 +437,8 @@ class WebAnalysisAgent:
         })
         
         # Используем AI для генерации дополнительных тест-кейсов
-        ai_test_cases = await self._generate_ai_test_cases(page_info)
+        if ai_test_cases is None:
+            ai_test_cases = await self._generate_ai_test_cases(page_info, stats)
         test_cases.extend(ai_test_cases)
         
         return test_cases
@@ -262,26 +459,36 @@ class WebAnalysisAgent:
         
         has_required_fields = False
         total_inputs = 0
+        forms_with_inputs = 0
+        forms_with_buttons_only = 0
         detailed_forms = []
         
         for i, form in enumerate(forms):
+            inputs = form.get("inputs", [])
+            buttons = form.get("buttons", [])
+            input_count = len(inputs)
+            button_count = len(buttons)
             form_info = {
                 "index": i + 1,
                 "action": form.get("action", "not specified"),
                 "method": form.get("method", "GET"),
-                "inputs": form.get("inputs", []),
-                "buttons": form.get("buttons", []),
-                "input_count": len(form.get("inputs", [])),
-                "button_count": len(form.get("buttons", [])),
+                "inputs": inputs,
+                "buttons": buttons,
+                "input_count": input_count,
+                "button_count": button_count,
                 "classes": form.get("classes", ""),
                 "form_text": form.get("form_text", ""),
                 "nearby_text": form.get("nearby_text", "")
             }
             
-            total_inputs += form_info["input_count"]
+            total_inputs += input_count
+            if input_count > 0:
+                forms_with_inputs += 1
+            elif button_count > 0:
+                forms_with_buttons_only += 1
             
-            # Проверяем наличие обязательных полей
-            if any(inp.get('required') for inp in form_info["inputs"]):
+            # Проверяем наличие обязательных полей (достаточно найти один раз)
+            if not has_required_fields and any(inp.get('required') for inp in inputs):
                 has_required_fields = True
             
             # Определяем назначение формы и добавляем описание
@@ -297,42 +504,41 @@ class WebAnalysisAgent:
                 "total_forms": len(forms),
                 "total_inputs": total_inputs,
                 "form_types": {k: len(v) for k, v in form_types.items() if v},
-                "forms_with_inputs": len([f for f in detailed_forms if f["input_count"] > 0]),
-                "forms_with_buttons_only": len([f for f in detailed_forms if f["input_count"] == 0 and f["button_count"] > 0])
+                "forms_with_inputs": forms_with_inputs,
+                "forms_with_buttons_only": forms_with_buttons_only
             },
             "has_required_fields": has_required_fields,
             "breakdown": form_types,
             "detailed_analysis": detailed_forms
         }
     
-    def _categorize_form_with_description(self, form_info: Dict) -> tuple[str, str]:
+    def _categorize_form_with_description(self, form_info: Dict) -> Tuple[str, str]:
         """Определяет тип формы и её описание по характеристикам"""
         
-        action = form_info.get("action", "").lower()
         inputs = form_info.get("inputs", [])
         buttons = form_info.get("buttons", [])
-        form_text = form_info.get("form_text", "").lower()
-        nearby_text = form_info.get("nearby_text", "").lower()
         classes = form_info.get("classes", "").lower()
         
-        # Анализируем поля формы
-        input_types = [inp.get("type", "").lower() for inp in inputs]
-        input_names = [inp.get("name", "").lower() for inp in inputs]
+        # Анализируем поля формы: множества для проверки точного совпадения,
+        # склеенные строки - для поиска подстрок за одну операцию
+        input_types = {inp.get("type", "").lower() for inp in inputs}
+        input_names = {inp.get("name", "").lower() for inp in inputs}
         button_texts = [btn.get("text", "").lower() for btn in buttons]
+        names_text = " ".join(input_names)
+        buttons_text = " ".join(button_texts)
         
         # Определяем тип формы по различным признакам
         
         # Формы входа/логина
         if "password" in input_types:
-            if any("confirm" in name or "repeat" in name for name in input_names):
+            if any(token in names_text for token in _CONFIRM_TOKENS):
                 return "registration", "Registration form with password confirmation"
             else:
                 return "login", "Login form with username/email and password"
         
         # Формы поиска
-        if (any("search" in name or "query" in name or "q" == name for name in input_names) or
-            any("search" in text for text in button_texts) or
-            "search" in classes):
+        if (any(token in names_text for token in _SEARCH_TOKENS) or "q" in input_names or
+            "search" in buttons_text or "search" in classes):
             return "search", "Search form for finding content"
         
         # Формы подписки на рассылку
@@ -340,18 +546,16 @@ class WebAnalysisAgent:
             return "newsletter", "Newsletter subscription form"
         
         # Формы обратной связи
-        if (any("message" in name or "comment" in name for name in input_names) or
-            any("textarea" == inp.get("type") for inp in inputs)):
+        if any(token in names_text for token in _MESSAGE_TOKENS) or "textarea" in input_types:
             return "contact", "Contact or feedback form"
         
         # Формы фильтрации (часто встречаются в каталогах)
         if ("filter" in classes or "form-horizontal" in classes or
-            any("filter" in text or "sort" in text for text in button_texts)):
+            any(token in buttons_text for token in _FILTER_TOKENS)):
             return "filter", "Filter or sorting form for catalog/listing"
         
         # Формы покупок/корзины
-        if (any("add to basket" in text or "add to cart" in text or "buy" in text for text in button_texts) or
-            any("basket" in text or "cart" in text for text in button_texts)):
+        if any(token in buttons_text for token in _CART_TOKENS):
             return "shopping", f"Shopping form - {button_texts[0] if button_texts else 'Add to cart'}"
         
         # Если форма содержит только кнопки без полей ввода
@@ -476,61 +680,51 @@ class WebAnalysisAgent:
     def _categorize_links(self, links: List[str]) -> Dict[str, List[str]]:
         """Категоризирует ссылки по типам"""
         
-        categories = {
-            "internal": [],
-            "external": [],
-            "anchor": [],
-            "download": [],
-            "social": [],
-            "email": [],
-            "phone": []
-        }
-        
-        social_domains = ["facebook.com", "twitter.com", "instagram.com", "linkedin.com", "youtube.com", "tiktok.com"]
+        categories: Dict[str, List[str]] = {}
         
         for link in links:
-            link_lower = link.lower()
-            
             if link.startswith("#"):
-                categories["anchor"].append(link)
+                category = "anchor"
             elif link.startswith("mailto:"):
-                categories["email"].append(link)
+                category = "email"
             elif link.startswith("tel:"):
-                categories["phone"].append(link)
-            elif any(domain in link_lower for domain in social_domains):
-                categories["social"].append(link)
-            elif link_lower.endswith(('.pdf', '.doc', '.docx', '.zip', '.rar')):
-                categories["download"].append(link)
-            elif link.startswith("http") and not any(domain in link_lower for domain in ["localhost", "127.0.0.1"]):
-                categories["external"].append(link)
+                category = "phone"
+            elif _SOCIAL_RE.search(link):
+                category = "social"
+            elif link.lower().endswith(_DOWNLOAD_SUFFIXES):
+                category = "download"
+            elif link.startswith("http") and not _LOCAL_RE.search(link):
+                category = "external"
             else:
-                categories["internal"].append(link)
+                category = "internal"
+            
+            # Пустые категории не попадают в результат
+            categories.setdefault(category, []).append(link)
         
-        # Удаляем пустые категории
-        return {k: v for k, v in categories.items() if v}
+        return categories
     
-    async def _generate_ai_test_cases(self, page_info: PageInfo) -> List[Dict[str, Any]]:
-        """Генерирует тест-кейсы с помощью AI"""
+    def _build_test_cases_task(self, page_info: PageInfo, stats: PageStats) -> str:
+        """Формирует описание задачи генерации AI тест-кейсов для LLM"""
         
         # Подготавливаем контекст для более точного анализа
         context_info = {
             "title": page_info.title,
-            "forms_count": len(page_info.forms),
-            "links_count": len(page_info.links),
-            "images_count": len(page_info.images),
-            "has_errors": bool(page_info.errors),
-            "load_time": page_info.load_time
+            "forms_count": stats.forms_count,
+            "links_count": stats.links_count,
+            "images_count": stats.images_count,
+            "has_errors": stats.has_errors,
+            "load_time": _rounded_load_time(page_info)
         }
         
-        prompt = f"""
+        task = f"""
         Based on the detailed analysis of this web page, suggest 1-2 SPECIFIC and UNIQUE test cases that are NOT covered by standard form/navigation/media testing.
 
         Website: {page_info.title}
         URL: {page_info.url}
-        Context: {json.dumps(context_info, indent=2)}
+        Context: {dumps_str(context_info)}
 
         Page content sample (analyze for specific functionality):
-        {page_info.content[:1500]}
+        {stats.content_snippet[:1500]}
 
         IMPORTANT REQUIREMENTS:
         1. Focus on SPECIFIC functionality visible in the content
@@ -539,57 +733,40 @@ class WebAnalysisAgent:
         4. Consider the website type and industry-specific testing needs
         5. Each test case should be actionable and specific to THIS website
 
-        RESPONSE FORMAT - Return ONLY valid JSON array:
-        [
-            {{
-                "type": "specific_functionality_type",
-                "title": "Specific Test Case Title",
-                "description": "Detailed description of what makes this test unique to this site",
-                "steps": ["specific step 1", "specific step 2", "specific step 3"],
-                "priority": "medium",
-                "rationale": "Why this test is important for THIS specific website"
-            }}
-        ]
-
-        If no specific functionality is found, return exactly: []
-
-        CRITICAL: Return ONLY the JSON array, no additional text or explanations.
+        Each test case has the format:
+        {{
+            "type": "specific_functionality_type",
+            "title": "Specific Test Case Title",
+            "description": "Detailed description of what makes this test unique to this site",
+            "steps": ["specific step 1", "specific step 2", "specific step 3"],
+            "priority": "medium",
+            "rationale": "Why this test is important for THIS specific website"
+        }}
         """
+        return _trim_prompt(task, Config.MAX_PROMPT_CHARS)
+    
+    async def _generate_ai_test_cases(self, page_info: PageInfo, stats: Optional[PageStats] = None) -> List[Dict[str, Any]]:
+        """Генерирует тест-кейсы с помощью AI"""
         
-        messages = [
-            SystemMessage(content="You are a senior QA engineer specializing in website-specific testing. Focus on unique functionality rather than generic tests. Be selective and only suggest tests that add real value. CRITICAL: Always respond with valid JSON format only, no additional text."),
-            HumanMessage(content=prompt)
-        ]
+        stats = stats or self._compute_page_stats(page_info)
         
-        try:
-            response = self.llm.invoke(messages)
-            response_content = response.content.strip()
-            
-            # Попытка извлечь JSON из ответа
-            json_content = response_content
-            
-            # Если ответ содержит markdown блоки кода, извлекаем JSON
-            if "```json" in response_content:
-                json_start = response_content.find("```json") + 7
-                json_end = response_content.find("```", json_start)
-                if json_end != -1:
-                    json_content = response_content[json_start:json_end].strip()
-            elif "```" in response_content:
-                json_start = response_content.find("```") + 3
-                json_end = response_content.find("```", json_start)
-                if json_end != -1:
-                    json_content = response_content[json_start:json_end].strip()
+        def build_messages():
+            prompt = f"""
+            {self._build_test_cases_task(page_info, stats)}
+
+            RESPONSE FORMAT - a JSON object: {{"test_cases": [test case objects]}}
+
+            If no specific functionality is found, return exactly: {{"test_cases": []}}
+            """
             
-            # Если ответ начинается не с [ или {, ищем первое вхождение
-            if not json_content.startswith(('[', '{')):
-                bracket_pos = json_content.find('[')
-                brace_pos = json_content.find('{')
-                if bracket_pos != -1 and (brace_pos == -1 or bracket_pos < brace_pos):
-                    json_content = json_content[bracket_pos:]
-                elif brace_pos != -1:
-                    json_content = json_content[brace_pos:]
+            return (self._SYS_TESTCASES, HumanMessage(content=prompt))
+        
+        try:
+            response = await self.llm.ainvoke_lazy(
+                self._prompt_cache_key("test_cases", self._SYS_TESTCASES, page_info, stats), build_messages, **_JSON_MODE
+            )
             
-            ai_test_cases = json.loads(json_content)
+            ai_test_cases = json.loads(response.content).get("test_cases", [])
             
             # Валидируем и фильтруем результаты
             validated_cases = []
@@ -600,12 +777,12 @@ class WebAnalysisAgent:
             return validated_cases
             
         except json.JSONDecodeError as e:
-            print(f"⚠️ AI test case generation failed - invalid JSON response")
-            print(f"   Debug: JSON error at position {e.pos}: {e.msg}")
-            print(f"   Response preview: {response.content[:200]}...")
+            logger.warning("⚠️ AI test case generation failed - invalid JSON response")
+            logger.debug("   Debug: JSON error at position %d: %s", e.pos, e.msg)
+            logger.debug("   Response preview: %s...", response.content[:200])
             return []
         except Exception as e:
-            print(f"⚠️ AI test case generation error: {str(e)}")
+            logger.warning("⚠️ AI test case generation error: %s", e)
             return []
     
     def _validate_test_case(self, test_case: Dict[str, Any]) -> bool:
@@ -637,25 +814,15 @@ class WebAnalysisAgent:
         return True
     
     async def _check_links(self, links: List[str]) -> List[Dict[str, Any]]:
-        """Проверяет ссылки на работоспособность"""
+        """Проверяет ссылки на работоспособность и возвращает только битые"""
         
         broken_links = []
         
-        for link in links:
-            try:
-                result = await self.browser_tool.check_link(link)
-                if result["status"] == "error" or (result["status_code"] and result["status_code"] >= 400):
-                    broken_links.append(result)
-                    
-                # Добавляем небольшую задержку между запросами
-                await asyncio.sleep(0.5)
-                
-            except Exception as e:
-                broken_links.append({
-                    "url": link,
-                    "status": "error",
-                    "error": str(e)
-                })
+        # Результаты обрабатываются по мере завершения проверок, не дожидаясь самой медленной
+        async for result in self.browser_tool.check_links_stream(links):
+            if result["status"] == "error" or (result.get("status_code") and result["status_code"] >= 400):
+                logger.debug("   Broken link: %s (%s)", result["url"], result.get("status_code") or result.get("error"))
+                broken_links.append(result)
         
         return broken_links
     
@@ -708,57 +875,64 @@ class WebAnalysisAgent:
         return bugs
     
     async def _ai_bug_detection(self, page_info: PageInfo) -> List[Dict[str, Any]]:
-        """Использует AI для поиска потенциальных багов"""
-        
-        prompt = f"""
-        Analyze this web page for potential bugs and issues:
-        
-        Title: {page_info.title}
-        Status code: {page_info.status_code}
-        Load time: {page_info.load_time}
-        Errors: {page_info.errors}
-        
-        Find potential problems and return them in JSON format:
-        [
-            {{
-                "type": "issue_type",
-                "severity": "high/medium/low",
-                "description": "problem description",
-                "recommendation": "fix recommendation"
-            }}
-        ]
+        """Использует AI для поиска потенциальных багов
         
-        Use only English language for all descriptions and recommendations.
+        Ответ кэшируется по URL, заголовку, коду ответа, времени загрузки (с точностью
+        до 0.1 с) и ошибкам страницы, поэтому повторный анализ той же страницы
+        не требует нового запроса к LLM. Ошибка запроса или ответа не прерывает
+        анализ сайта: в этом случае возвращается пустой список.
         """
         
-        messages = [
-            SystemMessage(content="You are a web testing expert. Find real problems and bugs. Use English only."),
-            HumanMessage(content=prompt)
-        ]
+        load_time = _rounded_load_time(page_info)
+        errors = page_info.errors or []
+        key_data = {
+            "task": "bugs",
+            "version": _PROMPT_VERSION,
+            "url": page_info.url,
+            "title": page_info.title,
+            "status_code": page_info.status_code,
+            "load_time": load_time,
+            "errors": errors
+        }
         
-        response = self.llm.invoke(messages)
+        def build_messages():
+            # Переменная часть идет последней, чтобы статический префикс кэшировался провайдером
+            prompt = (
+                "PAGE:\n"
+                f"Title: {page_info.title}\n"
+                f"Status code: {page_info.status_code}\n"
+                f"Load time: {load_time}\n"
+                f"Errors: {errors}"
+            )
+            
+            return (self._SYS_BUGS, HumanMessage(content=prompt))
         
         try:
-            return json.loads(response.content)
-        except json.JSONDecodeError:
+            response = await self.llm.ainvoke_lazy(key_data, build_messages, **_JSON_MODE)
+            # JSON mode гарантирует корректный JSON, ошибка возможна только при обрезанном ответе
+            bugs = json.loads(response.content).get("bugs", [])
+        except (json.JSONDecodeError, AttributeError):
+            logger.warning("⚠️ AI bug detection returned invalid JSON")
+            return []
+        except Exception as e:
+            logger.warning("⚠️ AI bug detection error: %s", e)
             return []
+        
+        return bugs if isinstance(bugs, list) else []
     
     async def _save_report(self, report: Dict[str, Any]):
         """Сохраняет отчет в файл"""
         
-        # Создаем директорию для отчетов
-        os.makedirs(Config.REPORTS_DIR, exist_ok=True)
-        
         # Генерируем имя файла
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        domain = report["url"].replace("https://", "").replace("http://", "").replace("/", "_")
+        domain = _SCHEME_RE.sub("", report["url"]).replace("/", "_")
         filename = f"{Config.REPORTS_DIR}/report_{domain}_{timestamp}.json"
         
-        # Сохраняем отчет
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        # Сериализуем отчет и записываем его в отдельном потоке, не блокируя event loop
+        data = dumps_bytes(report, pretty=Config.REPORTS_PRETTY_JSON)
+        await asyncio.get_running_loop().run_in_executor(None, Path(filename).write_bytes, data)
         
-        print(f"📊 Отчет сохранен: {filename}")
+        logger.info("📊 Отчет сохранен: %s", filename)
         
         return filename
     
@@ -769,23 +943,13 @@ class WebAnalysisAgent:
         total_max_minutes = 0
         
         for test_case in test_cases:
-            estimated_time = test_case.get("estimated_time", "")
-            if estimated_time:
-                # Парсим время вида "15-20 minutes" или "10 minutes"
-                if "-" in estimated_time:
-                    try:
-                        min_time, max_time = estimated_time.split("-")
-                        total_min_minutes += int(min_time.strip())
-                        total_max_minutes += int(max_time.split()[0].strip())
-                    except:
-                        pass
-                else:
-                    try:
-                        time_value = int(estimated_time.split()[0])
-                        total_min_minutes += time_value
-                        total_max_minutes += time_value
-                    except:
-                        pass
+            # Парсим время вида "15-20 minutes", "10 minutes" или просто число от LLM
+            match = _TIME_RE.search(str(test_case.get("estimated_time") or ""))
+            if not match:
+                continue
+            min_time = int(match.group(1))
+            total_min_minutes += min_time
+            total_max_minutes += int(match.group(2) or min_time)
         
         if total_min_minutes == total_max_minutes:
             return f"{total_min_minutes} minutes"
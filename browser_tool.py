@@ -1,11 +1,105 @@
 import asyncio
-from typing import Dict, List, Optional, Any
+import aiohttp
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Any, Sequence, Set
 from playwright.async_api import async_playwright, Browser, Page, BrowserContext
 from dataclasses import dataclass
 import json
 import time
 from config import Config
 
+# Сервисы аналитики и рекламы: не нужны для анализа и держат сеть открытой
+_BLOCKED_TRACKERS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "hotjar.com",
+    "segment.io",
+    "segment.com",
+    "mc.yandex.ru",
+    "facebook.net"
+)
+
+# Типы ресурсов, не нужные для анализа DOM (теги img остаются в DOM и без загрузки)
+_BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+# Собирает всю информацию о странице за один проход (один CDP-вызов вместо пяти).
+# Аргумент - максимальная длина текстового содержимого страницы. Ссылки и изображения
+# возвращаются полностью: по ним считается статистика страницы и категории ссылок,
+# а число проверяемых ссылок ограничивают сами агенты
+_PAGE_INFO_SCRIPT = """
+    (maxContent) => {
+        // Ссылки и изображения без дубликатов, в порядке появления на странице
+        const links = [...new Set(
+            Array.from(document.querySelectorAll('a[href]'), a => a.href)
+                 .filter(href => href && !href.startsWith('javascript:'))
+        )];
+        const images = [...new Set(
+            Array.from(document.querySelectorAll('img[src]'), img => img.src)
+        )];
+        
+        // Информация о формах с расширенным контекстом
+        const forms = Array.from(document.querySelectorAll('form')).map((form, index) => {
+            // Получаем все поля ввода
+            const inputs = Array.from(form.querySelectorAll('input, select, textarea')).map(input => ({
+                name: input.name || '',
+                type: input.type || 'text',
+                required: input.required || false,
+                placeholder: input.placeholder || '',
+                value: input.value || '',
+                // Ограничение длины передается, только если задано
+                ...(input.maxLength > 0 ? {maxLength: input.maxLength} : {})
+            }));
+            
+            // Получаем все кнопки в форме
+            const buttons = Array.from(form.querySelectorAll('button, input[type="submit"]')).map(btn => ({
+                text: btn.textContent?.trim() || btn.value || '',
+                type: btn.type || 'button'
+            }));
+            
+            // Пытаемся определить назначение формы по контексту
+            const formText = form.textContent?.trim() || '';
+            const nearbyText = form.parentElement?.textContent?.trim() || '';
+            
+            return {
+                index: index + 1,
+                action: form.action || '',
+                method: form.method || 'GET',
+                inputs: inputs,
+                buttons: buttons,
+                classes: form.className || '',
+                form_text: formText.substring(0, 200),
+                nearby_text: nearbyText.substring(0, 300),
+                has_inputs: inputs.length > 0,
+                has_buttons: buttons.length > 0
+            };
+        });
+        
+        // Мета-теги
+        const metaTags = {};
+        document.querySelectorAll('meta').forEach(meta => {
+            const name = meta.getAttribute('name') || meta.getAttribute('property');
+            const content = meta.getAttribute('content');
+            if (name && content) {
+                metaTags[name] = content;
+            }
+        });
+        
+        return {
+            title: document.title,
+            content: (document.body?.innerText || '').substring(0, maxContent),
+            links: links,
+            images: images,
+            forms: forms,
+            meta_tags: metaTags
+        };
+    }
+"""
+
+# Устанавливается в каждую вкладку через add_init_script, чтобы при извлечении
+# информации не передавать и не компилировать весь скрипт заново
+_PAGE_INFO_INIT_SCRIPT = "window.__aiWebTesterExtract = " + _PAGE_INFO_SCRIPT.strip() + ";"
+
 @dataclass
 class PageInfo:
     """Информация о странице"""
@@ -20,14 +114,103 @@ class PageInfo:
     load_time: Optional[float] = None
     errors: List[str] = None
 
+class BrowserPool:
+    """Пул прогретого браузера
+    
+    Держит один запущенный Chromium и выдает из него контексты, чтобы
+    последовательные анализы не платили за запуск браузера. Каждый анализ
+    получает новый контекст, который закрывается при возврате: cookies,
+    localStorage, sessionStorage и разрешения одного анализа не достаются
+    следующему. Одновременно выдается не больше size контекстов.
+    """
+    
+    def __init__(self, size: int = 4):
+        self.size = size
+        self.playwright = None
+        self.browser: Optional[Browser] = None
+        self._slots = asyncio.Semaphore(size)
+        self._contexts: Set[BrowserContext] = set()
+        self._start_lock = asyncio.Lock()
+        
+    async def __aenter__(self):
+        await self.start()
+        return self
+        
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        
+    async def start(self):
+        """Запускает браузер (один раз)"""
+        async with self._start_lock:
+            if self.browser:
+                return
+            self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(
+                headless=Config.BROWSER_HEADLESS
+            )
+    
+    async def acquire(self) -> BrowserContext:
+        """Выдает новый контекст прогретого браузера (ждет, если все слоты заняты)"""
+        await self._slots.acquire()
+        try:
+            await self.start()
+            context = await self.browser.new_context()
+            self._contexts.add(context)
+            return context
+        except Exception:
+            self._slots.release()
+            raise
+    
+    async def release(self, context: BrowserContext):
+        """Закрывает выданный контекст вместе со всем его состоянием и освобождает слот"""
+        try:
+            self._contexts.discard(context)
+            await context.close()
+        finally:
+            self._slots.release()
+    
+    @asynccontextmanager
+    async def context(self):
+        """Контекстный менеджер для acquire/release"""
+        context = await self.acquire()
+        try:
+            yield context
+        finally:
+            await self.release(context)
+    
+    async def close(self):
+        """Закрывает все контексты и браузер"""
+        while self._contexts:
+            await self._contexts.pop().close()
+        if self.browser:
+            await self.browser.close()
+            self.browser = None
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+
 class PlaywrightBrowserTool:
-    """Инструмент для работы с браузером через Playwright"""
+    """Инструмент для работы с браузером через Playwright
+    
+    Если передан pool, новый контекст создается в прогретом браузере пула
+    и закрывается при закрытии инструмента, иначе браузер запускается заново.
+    """
     
-    def __init__(self):
+    def __init__(self, pool: Optional[BrowserPool] = None, block_resources: bool = False, init_scripts: Sequence[str] = ()):
+        self.pool = pool
+        # Не загружать изображения, шрифты, медиа и стили (для анализа нужен только DOM)
+        self.block_resources = block_resources
+        # Дополнительные скрипты, которые выполняются в каждой вкладке до скриптов страницы
+        self.init_scripts = tuple(init_scripts)
+        # Ограничение числа одновременно открытых изолированных контекстов (isolated_page)
+        self._isolated_slots = asyncio.Semaphore(Config.MAX_PARALLEL_CONTEXTS)
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.playwright = None
+        self.http_session: Optional[aiohttp.ClientSession] = None
+        # Заголовки ответов на документы основной вкладки по URL (снимаются при навигации)
+        self.document_headers: Dict[str, Dict[str, str]] = {}
         
     async def __aenter__(self):
         """Асинхронный контекстный менеджер - вход"""
@@ -40,20 +223,84 @@ class PlaywrightBrowserTool:
         
     async def start(self):
         """Запускает браузер"""
-        self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(
-            headless=Config.BROWSER_HEADLESS
-        )
-        self.context = await self.browser.new_context()
+        if self.pool:
+            self.context = await self.pool.acquire()
+        else:
+            self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(
+                headless=Config.BROWSER_HEADLESS
+            )
+            self.context = await self.browser.new_context()
         self.page = await self.context.new_page()
+        await self._prepare_page(self.page)
+        self.page.on("response", self._remember_document_headers)
         
-        # Устанавливаем таймауты
-        self.page.set_default_timeout(Config.BROWSER_TIMEOUT)
+        # Общий HTTP-клиент для проверки ссылок без участия браузера
+        self.http_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=Config.LINK_CHECK_TIMEOUT),
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300)
+        )
         
+    @asynccontextmanager
+    async def isolated_page(self):
+        """Открывает вкладку в новом контексте браузера (свои cookies и storage)
+
+        Контекст закрывается при выходе, основная вкладка self.page не затрагивается.
+        Одновременно открыто не больше Config.MAX_PARALLEL_CONTEXTS контекстов,
+        остальные вызовы ждут своей очереди.
+        """
+        browser = self.pool.browser if self.pool else self.browser
+        if not browser:
+            raise RuntimeError("Браузер не запущен. Используйте async with или вызовите start()")
+
+        async with self._isolated_slots:
+            context = await browser.new_context()
+            try:
+                page = await context.new_page()
+                await self._prepare_page(page)
+                yield page
+            finally:
+                await context.close()
+
+    async def _prepare_page(self, page: Page):
+        """Настраивает новую вкладку: таймауты и блокировка трекеров"""
+        page.set_default_timeout(Config.BROWSER_TIMEOUT)
+        await page.add_init_script(_PAGE_INFO_INIT_SCRIPT)
+        for script in self.init_scripts:
+            await page.add_init_script(script)
+        await page.route("**/*", self._route_request)
+    
+    def _remember_document_headers(self, response):
+        """Запоминает заголовки ответа на документ основного фрейма основной вкладки
+        
+        Позволяет проверить заголовки страницы без повторного запроса к ней.
+        """
+        if response.request.resource_type == "document" and self.page and response.frame == self.page.main_frame:
+            self.document_headers[response.url] = response.headers
+    
+    async def _route_request(self, route):
+        """Отклоняет запросы к сервисам аналитики и, если включено, к тяжелым ресурсам"""
+        request = route.request
+        if (self.block_resources and request.resource_type in _BLOCKED_RESOURCE_TYPES) or \
+                any(domain in request.url for domain in _BLOCKED_TRACKERS):
+            await route.abort()
+        else:
+            await route.continue_()
+    
     async def close(self):
         """Закрывает браузер"""
+        if self.http_session:
+            await self.http_session.close()
+            self.http_session = None
         if self.page:
             await self.page.close()
+            self.page = None
+        self.document_headers.clear()
+        if self.pool:
+            if self.context:
+                await self.pool.release(self.context)
+                self.context = None
+            return
         if self.context:
             await self.context.close()
         if self.browser:
@@ -65,22 +312,25 @@ class PlaywrightBrowserTool:
         """Переходит на страницу и собирает информацию о ней"""
         if not self.page:
             raise RuntimeError("Браузер не запущен. Используйте async with или вызовите start()")
-            
+        
+        return await self._navigate_on(self.page, url)
+    
+    async def _navigate_on(self, page: Page, url: str) -> PageInfo:
+        """Переходит на страницу в указанной вкладке и собирает информацию о ней"""
         start_time = time.time()
         errors = []
         
         try:
             # Переходим на страницу
-            response = await self.page.goto(url, wait_until="domcontentloaded")
+            # Ждем события load, а не networkidle: на страницах с аналитикой, веб-сокетами
+            # и long polling сеть никогда не затихает и ожидание длилось бы до таймаута
+            response = await page.goto(url, wait_until="load", timeout=Config.PAGE_LOAD_TIMEOUT)
             status_code = response.status if response else None
             
-            # Ждем загрузки страницы
-            await self.page.wait_for_load_state("networkidle", timeout=Config.PAGE_LOAD_TIMEOUT)
-            
             load_time = time.time() - start_time
             
             # Собираем информацию о странице
-            page_info = await self._extract_page_info(url, status_code, load_time)
+            page_info = await self._extract_page_info(page, url, status_code, load_time)
             page_info.errors = errors
             
             return page_info
@@ -103,122 +353,105 @@ class PlaywrightBrowserTool:
                 errors=errors
             )
     
-    async def _extract_page_info(self, url: str, status_code: Optional[int], load_time: float) -> PageInfo:
-        """Извлекает информацию со страницы"""
-        
-        # Получаем заголовок
-        title = await self.page.title()
-        
-        # Получаем текстовое содержимое
-        content = await self.page.evaluate("() => document.body.innerText")
-        
-        # Получаем все ссылки
-        links = await self.page.evaluate("""
-            () => Array.from(document.querySelectorAll('a[href]'))
-                      .map(a => a.href)
-                      .filter(href => href && !href.startsWith('javascript:'))
-        """)
-        
-        # Получаем все изображения
-        images = await self.page.evaluate("""
-            () => Array.from(document.querySelectorAll('img[src]'))
-                      .map(img => img.src)
-        """)
-        
-        # Получаем информацию о формах с расширенным контекстом
-        forms = await self.page.evaluate("""
-            () => Array.from(document.querySelectorAll('form')).map((form, index) => {
-                // Получаем все поля ввода
-                const inputs = Array.from(form.querySelectorAll('input, select, textarea')).map(input => ({
-                    name: input.name || '',
-                    type: input.type || 'text',
-                    required: input.required || false,
-                    placeholder: input.placeholder || '',
-                    value: input.value || ''
-                }));
-                
-                // Получаем все кнопки в форме
-                const buttons = Array.from(form.querySelectorAll('button, input[type="submit"]')).map(btn => ({
-                    text: btn.textContent?.trim() || btn.value || '',
-                    type: btn.type || 'button'
-                }));
-                
-                // Пытаемся определить назначение формы по контексту
-                const formText = form.textContent?.trim() || '';
-                const nearbyText = form.parentElement?.textContent?.trim() || '';
-                
-                // Получаем классы формы для дополнительного анализа
-                const classes = form.className || '';
-                
-                return {
-                    index: index + 1,
-                    action: form.action || '',
-                    method: form.method || 'GET',
-                    inputs: inputs,
-                    buttons: buttons,
-                    classes: classes,
-                    form_text: formText.substring(0, 200),
-                    nearby_text: nearbyText.substring(0, 300),
-                    has_inputs: inputs.length > 0,
-                    has_buttons: buttons.length > 0
-                };
-            })
-        """)
-        
-        # Получаем мета-теги
-        meta_tags = await self.page.evaluate("""
-            () => {
-                const metas = {};
-                document.querySelectorAll('meta').forEach(meta => {
-                    const name = meta.getAttribute('name') || meta.getAttribute('property');
-                    const content = meta.getAttribute('content');
-                    if (name && content) {
-                        metas[name] = content;
-                    }
-                });
-                return metas;
-            }
-        """)
+    async def _extract_page_info(self, page: Page, url: str, status_code: Optional[int], load_time: float) -> PageInfo:
+        """Извлекает информацию со страницы одним вызовом page.evaluate"""
+        
+        max_content = Config.MAX_PAGE_CONTENT_CHARS
+        data = await page.evaluate(
+            "(maxContent) => window.__aiWebTesterExtract ? window.__aiWebTesterExtract(maxContent) : null", max_content
+        )
+        if data is None:
+            # Init-скрипт не сработал (например, страница его перезаписала) - передаем скрипт целиком
+            data = await page.evaluate(_PAGE_INFO_SCRIPT, max_content)
         
         return PageInfo(
             url=url,
-            title=title,
-            content=content[:5000],  # Ограничиваем размер контента
-            links=list(set(links)),  # Убираем дубликаты
-            images=list(set(images)),
-            forms=forms,
-            meta_tags=meta_tags,
+            title=data["title"],
+            content=data["content"],
+            links=data["links"],
+            images=data["images"],
+            forms=data["forms"],
+            meta_tags=data["meta_tags"],
             status_code=status_code,
             load_time=load_time
         )
     
     async def check_link(self, url: str) -> Dict[str, Any]:
-        """Проверяет доступность ссылки"""
+        """Проверяет доступность ссылки
+        
+        Использует HEAD-запрос через общий HTTP-клиент, а если сервер
+        не поддерживает HEAD (код ответа >= 400), повторяет проверку через GET.
+        """
+        if not self.http_session:
+            raise RuntimeError("Браузер не запущен. Используйте async with или вызовите start()")
+        
         try:
-            response = await self.page.goto(url, wait_until="domcontentloaded")
+            async with self.http_session.head(url, allow_redirects=True) as response:
+                status_code = response.status
+            
+            if status_code >= 400:
+                async with self.http_session.get(url, allow_redirects=True) as response:
+                    status_code = response.status
+            
             return {
                 "url": url,
                 "status": "ok",
-                "status_code": response.status if response else None,
+                "status_code": status_code,
                 "error": None
             }
-        except Exception as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
             return {
                 "url": url,
                 "status": "error",
                 "status_code": None,
-                "error": str(e)
+                "error": str(e) or e.__class__.__name__
             }
     
-    async def take_screenshot(self, path: str = None) -> bytes:
-        """Делает скриншот страницы"""
+    async def check_links_stream(self, urls: List[str], concurrency: int = 16) -> AsyncIterator[Dict[str, Any]]:
+        """Проверяет ссылки параллельно и отдает результаты по мере готовности
+        
+        Порядок результатов соответствует порядку завершения проверок, а не порядку urls.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def bounded(url: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.check_link(url)
+        
+        tasks = [asyncio.create_task(bounded(url)) for url in urls]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            # Если потребитель прервал итерацию, не оставляем висящих запросов
+            for task in tasks:
+                task.cancel()
+    
+    async def take_screenshot(self, path: str = None, full_page: bool = False, lossless: bool = False) -> bytes:
+        """Делает скриншот страницы
+        
+        По умолчанию снимается только видимая область в JPEG: это в разы быстрее
+        и компактнее полностраничного PNG. PNG используется при lossless=True
+        или если path оканчивается на .png.
+        
+        Если загрузка стилей и изображений заблокирована, страница перезагружается
+        с ними, чтобы скриншот выглядел так же, как у пользователя.
+        """
         if not self.page:
             raise RuntimeError("Браузер не запущен")
+        
+        block_resources = self.block_resources
+        try:
+            if block_resources:
+                self.block_resources = False
+                await self.page.reload(wait_until="load", timeout=Config.PAGE_LOAD_TIMEOUT)
             
-        screenshot = await self.page.screenshot(
-            path=path,
-            full_page=True
-        )
+            if lossless or (path and path.lower().endswith(".png")):
+                screenshot = await self.page.screenshot(path=path, full_page=full_page, type="png")
+            else:
+                screenshot = await self.page.screenshot(path=path, full_page=full_page, type="jpeg", quality=70)
+        finally:
+            self.block_resources = block_resources
         return screenshot
     
     async def execute_javascript(self, script: str) -> Any:
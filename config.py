@@ -10,19 +10,37 @@ class Config:
     # Playwright настройки
     BROWSER_HEADLESS = True
     BROWSER_TIMEOUT = 30000  # 30 секунд
-    PAGE_LOAD_TIMEOUT = 10000  # 10 секунд
+    PAGE_LOAD_TIMEOUT = 30000  # 30 секунд до события load
+    MAX_PARALLEL_CONTEXTS = 4  # сколько изолированных контекстов браузера открыто одновременно
     
     # Настройки для анализа сайтов
     MAX_PAGES_TO_ANALYZE = 10
     MAX_LINKS_TO_CHECK = 50
+    MAX_PAGE_CONTENT_CHARS = 5000  # сколько текста страницы забирать из браузера
+    LINK_CHECK_TIMEOUT = 10  # секунды на проверку одной ссылки
+    USER_FLOW_TIMEOUT = 10  # секунды на трассировку одного пользовательского потока
     REQUEST_DELAY = 1  # секунды между запросами
     
     # Настройки для отчетов
     REPORTS_DIR = "reports"
+    REPORTS_PRETTY_JSON = True  # False - компактный JSON (быстрее и меньше на диске)
+    
+    # Настройки промптов LLM
+    MAX_PROMPT_CHARS = 4000  # максимальный размер описания задачи в промпте
+    FORM_PURPOSE_LLM_FALLBACK = False  # True - формы, не распознанные эвристикой, классифицирует LLM
+    
+    # Настройки кэша ответов LLM
+    LLM_CACHE_ENABLED = True
+    LLM_CACHE_BACKEND = "file"  # "memory" или "file"
+    LLM_CACHE_DIR = ".cache/llm"
+    LLM_CACHE_TTL = 86400  # 24 часа
+    LLM_CACHE_MAX_TEMPERATURE = 0.2  # запросы с большей температурой не кэшируются
     
     @classmethod
     def validate(cls):
         """Проверяет наличие обязательных настроек"""
         if not cls.OPENAI_API_KEY or cls.OPENAI_API_KEY == "your-openai-api-key-here":
             raise ValueError("OPENAI_API_KEY не установлен")
+        # Директория для отчетов создается один раз при старте, а не при каждом сохранении
+        os.makedirs(cls.REPORTS_DIR, exist_ok=True)
         return True 
\ No newline at end of file
@@ -14,7 +14,7 @@ from pathlib import Path
 # Add the current directory to Python path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from main import main
+from main import run, build_args
 
 def demo():
     """Interactive demo for LangTest"""
@@ -105,15 +105,6 @@ def demo():
         
         headless = browser_mode == '1'
         
-        # Build command line arguments
-        sys.argv = ['demo.py', url]
-        
-        if not headless:
-            sys.argv.append('--no-headless')
-        
-        if generate_tests:
-            sys.argv.append('--generate-tests')
-        
         print()
         print("🚀 Starting LangTest Demo...")
         print(f"   URL: {url}")
@@ -123,7 +114,7 @@ def demo():
         print("-" * 60)
         
         # Run the main pipeline
-        asyncio.run(main())
+        asyncio.run(run(build_args(url, headless=headless, generate_tests=generate_tests)))
         
     except KeyboardInterrupt:
         print("\n⏹️  Demo interrupted by user")
@@ -148,11 +139,8 @@ def quick_demo():
     print("🖥️  Browser: Headless")
     print()
     
-    # Set up arguments
-    sys.argv = ['demo.py', url, '--generate-tests']
-    
     try:
-        asyncio.run(main())
+        asyncio.run(run(build_args(url, generate_tests=True)))
     except KeyboardInterrupt:
         print("\n⏹️  Quick demo interrupted")
     except Exception as e:
@@ -0,0 +1,22 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson опционален, без него используем стандартный json
+    orjson = None
+
+def dumps_bytes(obj: Any, pretty: bool = True) -> bytes:
+    """Сериализует объект в UTF-8 JSON (для записи отчетов на диск)"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option, default=str)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if pretty else None, default=str).encode('utf-8')
+
+def dumps_str(obj: Any) -> str:
+    """Сериализует объект в компактную JSON-строку (для вставки в промпты LLM)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS, default=str).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=str)
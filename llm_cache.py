@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from langchain.schema import AIMessage
+from config import Config
+
+class InMemoryLRU:
+    """Кэш ответов LLM в памяти с вытеснением давно неиспользуемых записей"""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at and expires_at < time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        expires_at = time.time() + ttl if ttl else 0
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._data.pop(key, None)
+
+    async def clear(self):
+        self._data.clear()
+
+async def _run_in_thread(func, *args):
+    """Выполняет блокирующую функцию в пуле потоков event loop (asyncio.to_thread есть только с Python 3.9)"""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+class FileBackend:
+    """Кэш ответов LLM в JSON-файлах на диске (переживает перезапуск)"""
+
+    def __init__(self, cache_dir: str = ".cache/llm"):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read(self, key: str) -> Optional[Any]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                item = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if item.get("expires_at") and item["expires_at"] < time.time():
+            self._remove(key)
+            return None
+        return item.get("value")
+
+    def _write(self, key: str, value: Any, ttl: Optional[int]):
+        item = {"expires_at": time.time() + ttl if ttl else 0, "value": value}
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(item, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(key))
+
+    def _remove(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    async def get(self, key: str) -> Optional[Any]:
+        return await _run_in_thread(self._read, key)
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        await _run_in_thread(self._write, key, value, ttl)
+
+    async def delete(self, key: str):
+        await _run_in_thread(self._remove, key)
+
+    def _clear(self):
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".json"):
+                self._remove(filename[:-5])
+
+    async def clear(self):
+        await _run_in_thread(self._clear)
+
+def create_cache_backend():
+    """Создает бэкенд кэша согласно настройкам Config"""
+    if Config.LLM_CACHE_BACKEND == "file":
+        return FileBackend(Config.LLM_CACHE_DIR)
+    return InMemoryLRU()
+
+class CachedChatOpenAI:
+    """Обертка над ChatOpenAI, кэширующая ответы по хэшу запроса
+
+    Ключ кэша - SHA-256 от модели, температуры, параметров модели и сообщений.
+    Кэшируются только запросы с температурой не выше max_temperature
+    (по умолчанию LLM_CACHE_MAX_TEMPERATURE), иначе ответы модели слишком
+    разнообразны для повторного использования.
+    Все остальные атрибуты и методы проксируются в исходный клиент.
+    """
+
+    def __init__(self, llm, backend=None, ttl: Optional[int] = None, max_temperature: Optional[float] = None):
+        self.llm = llm
+        self.backend = backend if backend is not None else create_cache_backend()
+        self.ttl = ttl if ttl is not None else Config.LLM_CACHE_TTL
+        self.max_temperature = max_temperature if max_temperature is not None else Config.LLM_CACHE_MAX_TEMPERATURE
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name: str):
+        return getattr(self.llm, name)
+
+    def _is_cacheable(self) -> bool:
+        temperature = getattr(self.llm, "temperature", None) or 0
+        return Config.LLM_CACHE_ENABLED and temperature <= self.max_temperature
+
+    def _hash(self, request: Dict[str, Any], kwargs: Dict[str, Any]) -> str:
+        payload = {
+            "model": getattr(self.llm, "model_name", None),
+            "temperature": getattr(self.llm, "temperature", None),
+            "model_kwargs": getattr(self.llm, "model_kwargs", None) or {},
+            "invoke_kwargs": kwargs,
+            **request
+        }
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def make_key(self, messages: List[Any], **kwargs) -> str:
+        """Вычисляет ключ кэша для списка сообщений и параметров вызова"""
+        return self._hash(
+            {"messages": [{"type": m.type, "content": m.content} for m in messages]},
+            kwargs
+        )
+
+    async def ainvoke(self, messages: List[Any], **kwargs) -> Any:
+        if not self._is_cacheable():
+            return await self.llm.ainvoke(messages, **kwargs)
+
+        key = self.make_key(messages, **kwargs)
+        cached = await self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            return AIMessage(content=cached)
+
+        self.misses += 1
+        response = await self.llm.ainvoke(messages, **kwargs)
+        await self.backend.set(key, response.content, ttl=self.ttl)
+        return response
+
+    async def ainvoke_lazy(self, key_data: Dict[str, Any], build_messages: Callable[[], List[Any]], **kwargs) -> Any:
+        """Как ainvoke, но ключ кэша берется из key_data, а сообщения строятся только при промахе
+
+        Позволяет не собирать и не сериализовать большой промпт, если ответ уже есть в кэше.
+        key_data должен однозначно определять содержимое промпта.
+        """
+        if not self._is_cacheable():
+            return await self.llm.ainvoke(build_messages(), **kwargs)
+
+        key = self._hash({"key_data": key_data}, kwargs)
+        cached = await self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            return AIMessage(content=cached)
+
+        self.misses += 1
+        response = await self.llm.ainvoke(build_messages(), **kwargs)
+        await self.backend.set(key, response.content, ttl=self.ttl)
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает статистику попаданий в кэш"""
+        return {"hits": self.hits, "misses": self.misses}
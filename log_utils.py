@@ -0,0 +1,45 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+
+_listener = None
+
+# Логгеры приложения (модули лежат в корне проекта, общего пакета нет).
+# Обработчик вешается только на них, а не на корневой логгер, чтобы INFO-сообщения
+# сторонних библиотек (например, "HTTP Request: POST ..." от httpx) не попадали в вывод
+_APP_LOGGERS = ("base_agent", "browser_tool", "smart_exploration_agent", "llm_cache", "test_code_generator")
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """Настраивает логирование приложения через очередь
+
+    Сообщения из корутин только кладутся в очередь, а форматирование и запись
+    в stdout выполняются фоновым потоком QueueListener, не блокируя event loop.
+    Повторные вызовы лишь меняют уровень логирования.
+    """
+    global _listener
+
+    loggers = [logging.getLogger(name) for name in _APP_LOGGERS]
+    for logger in loggers:
+        logger.setLevel(level)
+    if _listener is not None:
+        return
+
+    log_queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    for logger in loggers:
+        logger.addHandler(queue_handler)
+        # Не дублируем сообщения, если приложение само настроит корневой логгер
+        logger.propagate = False
+
+def is_logging_configured() -> bool:
+    """Проверяет, был ли уже вызван configure_logging"""
+    return _listener is not None
@@ -12,19 +12,20 @@ Usage:
 """
 
 import asyncio
+import contextlib
 import sys
 import argparse
+import logging
 import os
+from collections import Counter
 from pathlib import Path
-from base_agent import WebAnalysisAgent
-from test_code_generator import TestCodeGenerator
 from config import Config
+from log_utils import configure_logging
 import json
 
-async def main():
-    """Main function with integrated web analysis and test generation"""
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser"""
     
-    # Parse command line arguments
     parser = argparse.ArgumentParser(description='AI-powered web analysis with automated test generation')
     parser.add_argument('url', help='URL of the website to analyze')
     parser.add_argument('--headless', action='store_true', default=True, 
@@ -39,11 +40,41 @@ async def main():
                        help='Skip analysis and generate tests from existing report')
     parser.add_argument('--report-file', 
                        help='Use specific report file for test generation')
+    parser.add_argument('--log-level', default='INFO',
+                       choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                       help='Logging level for analysis progress messages (default: INFO)')
+    return parser
+
+def build_args(url: str, **overrides) -> argparse.Namespace:
+    """Build run() arguments directly, without parsing sys.argv (used by demos)"""
+    
+    args = argparse.Namespace(
+        url=url,
+        headless=True,
+        generate_tests=False,
+        output_dir='generated_tests',
+        skip_analysis=False,
+        report_file=None,
+        log_level='INFO'
+    )
+    for name, value in overrides.items():
+        if not hasattr(args, name):
+            raise TypeError(f"Unknown argument: {name}")
+        setattr(args, name, value)
+    return args
+
+async def main():
+    """Main function with integrated web analysis and test generation"""
     
-    args = parser.parse_args()
+    args = build_parser().parse_args()
+    await run(args)
+
+async def run(args: argparse.Namespace):
+    """Run web analysis and test generation with already parsed arguments"""
     
     # Set browser mode
     Config.BROWSER_HEADLESS = args.headless
+    configure_logging(getattr(logging, args.log_level))
     
     print("🚀 LangTest - AI-Powered Web Analysis & Test Generation")
     print(f"🌐 Target URL: {args.url}")
@@ -53,6 +84,10 @@ async def main():
         print(f"📁 Output directory: {args.output_dir}")
     print("-" * 60)
     
+    # The test generator has no data dependency on the report, so it is constructed
+    # in a background thread while the analysis runs (see start_generator)
+    generator_task = None
+    
     try:
         report = None
         
@@ -62,6 +97,12 @@ async def main():
             print("📊 PHASE 1: WEB ANALYSIS")
             print("="*60)
             
+            # Imported here: pulls in langchain and playwright, not needed for --help or --skip-analysis
+            from base_agent import WebAnalysisAgent
+            # Started only after the agent import: both pull in langchain/openai,
+            # and importing them from two threads at once is not safe
+            if args.generate_tests:
+                generator_task = start_generator()
             agent = WebAnalysisAgent()
             report = await agent.analyze_website(args.url)
             
@@ -91,7 +132,9 @@ async def main():
                     report = json.load(f)
             
             # Generate test code
-            generator = TestCodeGenerator()
+            if generator_task is None:
+                generator_task = start_generator()
+            generator = await generator_task
             result = await generator.generate_test_code(report, args.output_dir)
             
             print("\n✅ Test code generation completed!")
@@ -129,6 +172,25 @@ async def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        # Always collect the background result, so a failed construction is not
+        # reported as "exception was never retrieved"
+        if generator_task is not None:
+            generator_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await generator_task
+
+def start_generator() -> asyncio.Future:
+    """Start constructing the test code generator in the default thread pool"""
+    
+    # run_in_executor instead of asyncio.to_thread, which needs Python 3.9
+    return asyncio.get_running_loop().run_in_executor(None, create_generator)
+
+def create_generator():
+    """Import and construct the test code generator (runs in a worker thread)"""
+    
+    from test_code_generator import TestCodeGenerator
+    return TestCodeGenerator()
 
 def print_analysis_summary(report: dict):
     """Print summary of web analysis results"""
@@ -148,14 +210,9 @@ def print_analysis_summary(report: dict):
         print(f"\n🧪 TEST CASES IDENTIFIED")
         print(f"   📊 Total: {len(tc_list)}")
         
-        # Count by priority
-        priorities = {}
-        types = {}
-        for tc in tc_list:
-            priority = tc.get('priority', 'unknown')
-            tc_type = tc.get('type', 'unknown')
-            priorities[priority] = priorities.get(priority, 0) + 1
-            types[tc_type] = types.get(tc_type, 0) + 1
+        # Count by priority and type
+        priorities = Counter(tc.get('priority', 'unknown') for tc in tc_list)
+        types = Counter(tc.get('type', 'unknown') for tc in tc_list)
         
         print(f"   🎯 Priorities: {', '.join([f'{k}({v})' for k, v in priorities.items()])}")
         print(f"   🔍 Types: {', '.join([f'{k}({v})' for k, v in types.items()])}")
@@ -198,20 +255,20 @@ def find_latest_report(url: str) -> str:
     # Extract domain from URL for matching
     from urllib.parse import urlparse
     domain = urlparse(url).netloc.replace('www.', '')
+    prefix = f"report_{domain}"
     
-    # Find matching report files
-    matching_files = []
-    for filename in os.listdir(reports_dir):
-        if filename.startswith(f"report_{domain}") and filename.endswith(".json"):
-            filepath = os.path.join(reports_dir, filename)
-            matching_files.append((filepath, os.path.getmtime(filepath)))
-    
-    if not matching_files:
-        return None
+    # Single pass over the directory: DirEntry caches stat info, no sorting needed
+    latest_path = None
+    latest_mtime = -1.0
+    with os.scandir(reports_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith(prefix) and name.endswith(".json"):
+                mtime = entry.stat().st_mtime
+                if mtime > latest_mtime:
+                    latest_mtime, latest_path = mtime, entry.path
     
-    # Return the most recent file
-    matching_files.sort(key=lambda x: x[1], reverse=True)
-    return matching_files[0][0]
+    return latest_path
 
 def demo():
     """Demo function for testing the tool"""
@@ -244,13 +301,8 @@ def demo():
         gen_tests = input("Generate automated tests? (y/N): ").strip().lower()
         generate_tests = gen_tests in ['y', 'yes']
         
-        # Build command line arguments
-        sys.argv = ['main.py', url]
-        if generate_tests:
-            sys.argv.append('--generate-tests')
-        
         # Run the pipeline
-        asyncio.run(main())
+        asyncio.run(run(build_args(url, generate_tests=generate_tests)))
         
     except KeyboardInterrupt:
         print("\n⏹️  Demo interrupted")
@@ -6,40 +6,139 @@ This script checks for potential security issues before publishing to GitHub.
 Run this before committing your code to ensure no sensitive data is exposed.
 """
 
+import fnmatch
+import mmap
 import os
 import re
 import json
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
 
-def check_api_keys():
+# OpenAI project API keys (sk-proj-...) and OpenAI API keys of specific length,
+# combined into one bytes pattern so each file is scanned once without decoding
+_API_KEY_RE = re.compile(rb'sk-(?:proj-[a-zA-Z0-9_-]{20,}|[a-zA-Z0-9_-]{48,})')
+
+# Placeholder markers in example keys (case-insensitive, single scan)
+_PLACEHOLDER_RE = re.compile(r'your-|example', re.IGNORECASE)
+
+# Rules every .gitignore of the project must contain
+_GITIGNORE_REQUIRED = [
+    'reports/',
+    'exploration_reports/',
+    '.env',
+    '__pycache__/',
+    '*.log',
+    'generated_tests/',
+]
+
+# Matches a whole .gitignore line that is one of the required rules (so '.envrc' does not
+# count as '.env'); '/dir/' and 'dir' are treated as 'dir/', comment lines never match
+_GITIGNORE_RULE_RE = re.compile(
+    r'^[ \t]*/?(' + '|'.join(re.escape(p.strip('/')) for p in _GITIGNORE_REQUIRED) + r')/?[ \t\r]*$',
+    re.MULTILINE
+)
+
+# Files at least this large are memory-mapped; for smaller ones mmap setup costs more than read()
+_MMAP_MIN_SIZE = 64 * 1024
+
+# Below this number of files the scan runs in the current process
+_PARALLEL_MIN_FILES = 64
+
+# Sensitive files are counted up to this number, larger counts are reported as "100+"
+_MAX_COUNTED_MATCHES = 100
+
+# Directories that are never scanned (and never descended into)
+_SKIP_DIRS = frozenset({'venv', '.venv', 'env', '__pycache__', 'site-packages', '.git', 'node_modules', '.tox'})
+
+def _iter_py_files(root='.', skip=_SKIP_DIRS):
+    """Yield paths of .py files under root, pruning skipped directories without entering them"""
+    def warn(error):
+        print(f"Warning: Could not list {error.filename}: {error}")
+    
+    for dirpath, dirs, files in os.walk(root, topdown=True, onerror=warn):
+        # Pruning dirs in place stops os.walk from descending into them
+        dirs[:] = [d for d in dirs if d not in skip]
+        for name in files:
+            if name.endswith('.py'):
+                yield os.path.join(dirpath, name)
+
+def _read_text(path):
+    """Return file contents, or None if the file does not exist"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+@dataclass
+class RepoContext:
+    """Filesystem state shared by all checks, collected once per run"""
+    py_files: List[str]
+    gitignore_text: Optional[str]
+    env_example_exists: bool
+    config_py_text: Optional[str]
+    
+    @classmethod
+    def build(cls, root='.'):
+        return cls(
+            py_files=list(_iter_py_files(root)),
+            gitignore_text=_read_text(os.path.join(root, '.gitignore')),
+            env_example_exists=os.path.exists(os.path.join(root, '.env.example')),
+            config_py_text=_read_text(os.path.join(root, 'config.py'))
+        )
+
+def _find_api_keys(buf, path):
+    """Return issue messages for API keys found in a bytes-like buffer (bytes or mmap)"""
+    # Every key starts with "sk-": skip the regex for files without it
+    if buf.find(b'sk-') == -1:
+        return []
+    
+    issues = []
+    for m in _API_KEY_RE.finditer(buf):
+        match = m.group(0).decode('ascii', 'replace')
+        # Skip placeholder values
+        if not _PLACEHOLDER_RE.search(match):
+            issues.append(f"Potential API key in {path}: {match[:15]}...")
+    return issues
+
+def _scan_file(py_file):
+    """Scan one file for API keys; returns (issues, warning message or None)"""
+    try:
+        # Keys are ASCII, so files are scanned as raw bytes without UTF-8 decoding.
+        # Large files are memory-mapped instead of being read into memory
+        with open(py_file, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return [], None
+            if size < _MMAP_MIN_SIZE:
+                return _find_api_keys(f.read(), py_file), None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _find_api_keys(mm, py_file), None
+    except Exception as e:
+        return [], f"Warning: Could not read {py_file}: {e}"
+
+def check_api_keys(ctx: Optional[RepoContext] = None):
     """Check for hardcoded API keys in Python files"""
     print("🔍 Checking for hardcoded API keys...")
     
-    # More specific OpenAI API key pattern
-    api_key_patterns = [
-        r'sk-proj-[a-zA-Z0-9_-]{20,}',  # OpenAI project API keys
-        r'sk-[a-zA-Z0-9_-]{48,}',       # OpenAI API keys (specific length)
-    ]
-    
+    ctx = ctx or RepoContext.build()
+    py_files = ctx.py_files
     issues = []
     
-    for py_file in Path('.').rglob('*.py'):
-        # Skip virtual environments and cache directories
-        if any(skip in str(py_file) for skip in ['venv', 'env', '__pycache__', 'site-packages', '.git']):
-            continue
-            
-        try:
-            with open(py_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            for pattern in api_key_patterns:
-                matches = re.findall(pattern, content)
-                for match in matches:
-                    # Skip placeholder values
-                    if 'your-' not in match.lower() and 'example' not in match.lower():
-                        issues.append(f"Potential API key in {py_file}: {match[:15]}...")
-        except Exception as e:
-            print(f"Warning: Could not read {py_file}: {e}")
+    # Files are independent, so large trees are scanned in a process pool;
+    # for a handful of files starting worker processes costs more than it saves
+    if len(py_files) < _PARALLEL_MIN_FILES:
+        for file_issues, warning in map(_scan_file, py_files):
+            issues.extend(file_issues)
+            if warning:
+                print(warning)
+    else:
+        with ProcessPoolExecutor() as executor:
+            for file_issues, warning in executor.map(_scan_file, py_files, chunksize=32):
+                issues.extend(file_issues)
+                if warning:
+                    print(warning)
     
     if issues:
         print("❌ Found potential API keys:")
@@ -50,10 +149,12 @@ def check_api_keys():
         print("✅ No hardcoded API keys found")
         return True
 
-def check_sensitive_files():
+def check_sensitive_files(ctx: Optional[RepoContext] = None):
     """Check for sensitive files that should be gitignored"""
     print("\n🔍 Checking for sensitive files...")
     
+    ctx = ctx or RepoContext.build()
+    
     sensitive_patterns = [
         'reports/*.json',
         'exploration_reports/*.json',
@@ -61,18 +162,39 @@ def check_sensitive_files():
         '*.log',
     ]
     
-    # Check for __pycache__ in project root (not in venv)
+    # Group patterns by directory so every directory is listed once,
+    # matching entry names against all patterns for that directory
+    matchers_by_dir = {}
+    for pattern in sensitive_patterns:
+        directory, _, name = pattern.rpartition('/')
+        matchers_by_dir.setdefault(directory or '.', []).append((pattern, re.compile(fnmatch.translate(name))))
+    
+    counts = dict.fromkeys(sensitive_patterns, 0)
     pycache_dirs = []
-    for item in Path('.').iterdir():
-        if item.name == '__pycache__' and item.is_dir():
-            pycache_dirs.append(item)
+    
+    for directory, matchers in matchers_by_dir.items():
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                for pattern, rx in matchers:
+                    # Counting stops at the cap: the report only needs "many"
+                    if counts[pattern] < _MAX_COUNTED_MATCHES and rx.match(entry.name):
+                        counts[pattern] += 1
+                # Check for __pycache__ in project root (not in venv)
+                if directory == '.' and entry.name == '__pycache__' and entry.is_dir():
+                    pycache_dirs.append(entry.path)
+                elif directory != '.' and all(counts[pattern] >= _MAX_COUNTED_MATCHES for pattern, _ in matchers):
+                    break
     
     issues = []
     
-    for pattern in sensitive_patterns:
-        files = list(Path('.').glob(pattern))
-        if files:
-            issues.append(f"Found {len(files)} files matching '{pattern}'")
+    for pattern, count in counts.items():
+        if count:
+            more = '+' if count >= _MAX_COUNTED_MATCHES else ''
+            issues.append(f"Found {count}{more} files matching '{pattern}'")
     
     if pycache_dirs:
         issues.append(f"Found {len(pycache_dirs)} __pycache__ directories in project root")
@@ -83,7 +205,7 @@ def check_sensitive_files():
             print(f"   {issue}")
         
         # Check if .gitignore exists
-        if Path('.gitignore').exists():
+        if ctx.gitignore_text is not None:
             print("✅ .gitignore file exists")
         else:
             print("❌ .gitignore file missing!")
@@ -93,23 +215,22 @@ def check_sensitive_files():
     
     return True
 
-def check_env_setup():
+def check_env_setup(ctx: Optional[RepoContext] = None):
     """Check environment setup"""
     print("\n🔍 Checking environment setup...")
     
+    ctx = ctx or RepoContext.build()
     issues = []
     
     # Check for .env.example
-    if not Path('.env.example').exists():
+    if not ctx.env_example_exists:
         issues.append(".env.example file missing")
     else:
         print("✅ .env.example file exists")
     
     # Check config.py for proper environment variable usage
-    if Path('config.py').exists():
-        with open('config.py', 'r') as f:
-            config_content = f.read()
-            
+    config_content = ctx.config_py_text
+    if config_content is not None:
         if 'sk-' in config_content and 'os.getenv' not in config_content:
             issues.append("config.py may contain hardcoded API keys")
         elif 'os.getenv' in config_content:
@@ -123,30 +244,19 @@ def check_env_setup():
     
     return True
 
-def check_gitignore():
+def check_gitignore(ctx: Optional[RepoContext] = None):
     """Check .gitignore completeness"""
     print("\n🔍 Checking .gitignore completeness...")
     
-    if not Path('.gitignore').exists():
+    ctx = ctx or RepoContext.build()
+    gitignore_content = ctx.gitignore_text
+    if gitignore_content is None:
         print("❌ .gitignore file missing!")
         return False
     
-    with open('.gitignore', 'r') as f:
-        gitignore_content = f.read()
-    
-    required_patterns = [
-        'reports/',
-        'exploration_reports/',
-        '.env',
-        '__pycache__/',
-        '*.log',
-        'generated_tests/',
-    ]
-    
-    missing = []
-    for pattern in required_patterns:
-        if pattern not in gitignore_content:
-            missing.append(pattern)
+    # One pass over the file finds all required rules at once
+    found = {m.group(1) for m in _GITIGNORE_RULE_RE.finditer(gitignore_content)}
+    missing = [pattern for pattern in _GITIGNORE_REQUIRED if pattern.strip('/') not in found]
     
     if missing:
         print("⚠️  Missing patterns in .gitignore:")
@@ -169,10 +279,12 @@ def main():
         check_gitignore,
     ]
     
+    # Collect the file list and shared file contents once for all checks
+    ctx = RepoContext.build()
     all_passed = True
     
     for check in checks:
-        if not check():
+        if not check(ctx):
             all_passed = False
     
     print("\n" + "=" * 50)
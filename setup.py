@@ -7,19 +7,34 @@ This script helps users set up the LangTest environment quickly.
 
 import os
 import sys
+import shlex
 import subprocess
 from pathlib import Path
 
 def run_command(command, description):
-    """Run a command and handle errors"""
+    """Run a command, streaming its output, and handle errors
+    
+    command is an argv list (or a string split with shlex); it is run without a shell.
+    """
     print(f"📦 {description}...")
+    if isinstance(command, str):
+        command = shlex.split(command)
     try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-        print(f"✅ {description} completed")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ {description} failed: {e.stderr}")
+        # Output is passed through line by line instead of being buffered in memory
+        with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              text=True, bufsize=1) as proc:
+            for line in proc.stdout:
+                sys.stdout.write(line)
+            returncode = proc.wait()
+    except OSError as e:
+        print(f"❌ {description} failed: {e}")
+        return False
+    
+    if returncode != 0:
+        print(f"❌ {description} failed (exit code {returncode})")
         return False
+    print(f"✅ {description} completed")
+    return True
 
 def check_python_version():
     """Check if Python version is compatible"""
@@ -39,11 +54,13 @@ def setup_environment():
         return False
     
     # Install dependencies
-    if not run_command("pip install -r requirements.txt", "Installing Python dependencies"):
+    # Use the current interpreter's pip and playwright (no PATH lookup, same site-packages)
+    pip_install = [sys.executable, '-m', 'pip', 'install', '--prefer-binary', '-r', 'requirements.txt']
+    if not run_command(pip_install, "Installing Python dependencies"):
         return False
     
     # Install Playwright browsers
-    if not run_command("playwright install", "Installing Playwright browsers"):
+    if not run_command([sys.executable, '-m', 'playwright', 'install'], "Installing Playwright browsers"):
         print("⚠️  Playwright installation failed. You may need to install it manually:")
         print("   pip install playwright && playwright install")
     
@@ -4,9 +4,58 @@
 """
 
 import asyncio
+import re
 import sys
+import threading
+from collections import namedtuple
+from operator import itemgetter
+from types import MappingProxyType
 from smart_exploration_agent import SmartExplorationAgent
 from datetime import datetime
+from typing import Optional
+from urllib.parse import urlparse
+
+# Демонстрационные сайты: создаются один раз при импорте модуля
+_DEMO_SITES = MappingProxyType({
+    "1": {
+        "name": "HTTPBin Forms",
+        "url": "https://httpbin.org/forms/post",
+        "description": "Сайт с различными формами для тестирования",
+        "features": ("Формы", "POST запросы", "Валидация")
+    },
+    "2": {
+        "name": "Books to Scrape",
+        "url": "http://books.toscrape.com",
+        "description": "E-commerce сайт с книгами",
+        "features": ("Каталог", "Поиск", "Навигация")
+    },
+    "3": {
+        "name": "Example.com",
+        "url": "https://example.com",
+        "description": "Простой демонстрационный сайт",
+        "features": ("Базовая структура", "Простота")
+    },
+    "4": {
+        "name": "JSONPlaceholder",
+        "url": "https://jsonplaceholder.typicode.com",
+        "description": "API для тестирования",
+        "features": ("REST API", "JSON", "Тестовые данные")
+    }
+})
+
+# Разделы отчета исследования, извлеченные один раз для вывода сводки и меню
+SummaryView = namedtuple(
+    'SummaryView',
+    'url auth_forms reg_attempts form_interactions hidden user_flows security performance main_page_analysis report'
+)
+
+# Поля, которые почти всегда есть в результатах: извлекаются одним вызовом,
+# а к .get() со значениями по умолчанию переходим только при KeyError
+_get_filled_and_errors = itemgetter('filled_fields', 'errors')
+_get_buttons_and_links = itemgetter('buttons', 'links')
+
+# Допустимые ответы в меню выбора сайта
+_MENU_RE = re.compile(r'[1-5]')
 
 def print_banner():
     """Выводит красивый баннер"""
@@ -23,33 +72,8 @@ def print_banner():
     print()
 
 def get_demo_sites():
-    """Возвращает список демонстрационных сайтов"""
-    return {
-        "1": {
-            "name": "HTTPBin Forms",
-            "url": "https://httpbin.org/forms/post",
-            "description": "Сайт с различными формами для тестирования",
-            "features": ["Формы", "POST запросы", "Валидация"]
-        },
-        "2": {
-            "name": "Books to Scrape",
-            "url": "http://books.toscrape.com",
-            "description": "E-commerce сайт с книгами",
-            "features": ["Каталог", "Поиск", "Навигация"]
-        },
-        "3": {
-            "name": "Example.com",
-            "url": "https://example.com",
-            "description": "Простой демонстрационный сайт",
-            "features": ["Базовая структура", "Простота"]
-        },
-        "4": {
-            "name": "JSONPlaceholder",
-            "url": "https://jsonplaceholder.typicode.com",
-            "description": "API для тестирования",
-            "features": ["REST API", "JSON", "Тестовые данные"]
-        }
-    }
+    """Возвращает список демонстрационных сайтов (неизменяемый, общий для всех вызовов)"""
+    return _DEMO_SITES
 
 def display_demo_sites():
     """Отображает доступные демонстрационные сайты"""
@@ -68,12 +92,48 @@ def display_demo_sites():
     print("5. Ввести свой URL")
     print()
 
-def get_user_choice():
+async def ainput(prompt: str = "") -> str:
+    """input(), не блокирующий event loop
+    
+    Чтение идет в daemon-потоке: при Ctrl+C процесс не будет ждать,
+    пока пользователь нажмет Enter в зависшем input().
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def set_result(result, error):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    
+    def read():
+        try:
+            result, error = input(prompt), None
+        except BaseException as e:
+            result, error = None, e
+        loop.call_soon_threadsafe(set_result, result, error)
+    
+    threading.Thread(target=read, daemon=True).start()
+    return await future
+
+async def prewarm_dns(sites: dict):
+    """Заранее резолвит домены демо-сайтов, пока пользователь выбирает"""
+    loop = asyncio.get_running_loop()
+    for site in sites.values():
+        try:
+            await loop.getaddrinfo(urlparse(site['url']).hostname, 443)
+        except OSError:
+            pass
+
+async def get_user_choice():
     """Получает выбор пользователя"""
     while True:
         try:
-            choice = input("Выберите сайт для исследования (1-5): ").strip()
-            if choice in ['1', '2', '3', '4', '5']:
+            choice = (await ainput("Выберите сайт для исследования (1-5): ")).strip()
+            if _MENU_RE.fullmatch(choice):
                 return choice
             else:
                 print("❌ Пожалуйста, выберите число от 1 до 5")
@@ -81,11 +141,11 @@ def get_user_choice():
             print("\n👋 До свидания!")
             sys.exit(0)
 
-def get_custom_url():
+async def get_custom_url():
     """Получает пользовательский URL"""
     while True:
         try:
-            url = input("Введите URL для исследования: ").strip()
+            url = (await ainput("Введите URL для исследования: ")).strip()
             if url:
                 if not url.startswith(('http://', 'https://')):
                     url = 'https://' + url
@@ -96,11 +156,11 @@ def get_custom_url():
             print("\n👋 До свидания!")
             sys.exit(0)
 
-def get_exploration_depth():
+async def get_exploration_depth():
     """Получает глубину исследования"""
     while True:
         try:
-            depth = input("Глубина исследования (1-5, по умолчанию 3): ").strip()
+            depth = (await ainput("Глубина исследования (1-5, по умолчанию 3): ")).strip()
             if not depth:
                 return 3
             depth = int(depth)
@@ -114,8 +174,8 @@ def get_exploration_depth():
             print("\n👋 До свидания!")
             sys.exit(0)
 
-async def run_smart_exploration(url: str, depth: int):
-    """Запускает умное исследование сайта"""
+async def run_smart_exploration(url: str, depth: int) -> Optional[SummaryView]:
+    """Запускает умное исследование сайта и возвращает подготовленное представление отчета"""
     
     print(f"🚀 Начинаю умное исследование сайта: {url}")
     print(f"📊 Глубина исследования: {depth}")
@@ -134,71 +194,97 @@ async def run_smart_exploration(url: str, depth: int):
         print("-" * 80)
         
         # Выводим краткую статистику
-        print_exploration_summary(report)
+        view = build_summary_view(report)
+        print_exploration_summary(view)
         
-        return report
+        return view
         
     except Exception as e:
         print(f"❌ Ошибка при исследовании: {e}")
         return None
 
-def print_exploration_summary(report: dict):
+def build_summary_view(report: dict) -> SummaryView:
+    """Извлекает из отчета все разделы один раз, чтобы меню не обходило отчет заново"""
+    return SummaryView(
+        url=report.get('url', 'N/A'),
+        auth_forms=report.get('auth_forms_discovered', 0),
+        reg_attempts=report.get('registration_attempts', []),
+        form_interactions=report.get('form_interactions', []),
+        hidden=report.get('hidden_functionality', []),
+        user_flows=report.get('user_flows', []),
+        security=report.get('security_findings', []),
+        performance=report.get('performance_insights', {}),
+        main_page_analysis=report.get('main_page_analysis', {}),
+        report=report
+    )
+
+def print_exploration_summary(view: SummaryView):
     """Выводит краткую сводку по исследованию"""
-    
-    print("📊 КРАТКАЯ СВОДКА:")
-    print(f"   🌐 URL: {report.get('url', 'N/A')}")
-    print(f"   📄 Обнаружено форм аутентификации: {report.get('auth_forms_discovered', 0)}")
-    print(f"   👥 Попыток регистрации: {len(report.get('registration_attempts', []))}")
-    print(f"   📝 Форм протестировано: {len(report.get('form_interactions', []))}")
-    print(f"   🕵️ Скрытых функций найдено: {len(report.get('hidden_functionality', []))}")
-    print(f"   🛤️ Пользовательских потоков: {len(report.get('user_flows', []))}")
-    print(f"   🔒 Проблем безопасности: {len(report.get('security_findings', []))}")
+    # Вывод собирается в список строк и печатается одной записью
+    lines = []
+    
+    lines.append("📊 КРАТКАЯ СВОДКА:")
+    lines.append(f"   🌐 URL: {view.url}")
+    lines.append(f"   📄 Обнаружено форм аутентификации: {view.auth_forms}")
+    lines.append(f"   👥 Попыток регистрации: {len(view.reg_attempts)}")
+    lines.append(f"   📝 Форм протестировано: {len(view.form_interactions)}")
+    lines.append(f"   🕵️ Скрытых функций найдено: {len(view.hidden)}")
+    lines.append(f"   🛤️ Пользовательских потоков: {len(view.user_flows)}")
+    lines.append(f"   🔒 Проблем безопасности: {len(view.security)}")
     
     # Детали по регистрации
-    reg_attempts = report.get('registration_attempts', [])
+    reg_attempts = view.reg_attempts
     if reg_attempts:
-        print("\n👥 ПОПЫТКИ РЕГИСТРАЦИИ:")
+        lines.append("\n👥 ПОПЫТКИ РЕГИСТРАЦИИ:")
         for attempt in reg_attempts:
             persona = attempt.get('persona', 'Unknown')
-            success = attempt.get('submit_result', {}).get('success', False)
+            try:
+                success = attempt['submit_result']['success']
+            except KeyError:
+                success = False
             status = "✅ Успешно" if success else "❌ Неудачно"
-            print(f"   • {persona}: {status}")
+            lines.append(f"   • {persona}: {status}")
     
     # Детали по формам
-    form_interactions = report.get('form_interactions', [])
+    form_interactions = view.form_interactions
     if form_interactions:
-        print("\n📝 АНАЛИЗ ФОРМ:")
+        lines.append("\n📝 АНАЛИЗ ФОРМ:")
         for form in form_interactions:
             purpose = form.get('purpose', 'unknown')
-            filled = len(form.get('fill_result', {}).get('filled_fields', []))
-            print(f"   • Форма {form.get('form_index', '?')} ({purpose}): заполнено {filled} полей")
+            try:
+                filled = len(form['fill_result']['filled_fields'])
+            except KeyError:
+                filled = 0
+            lines.append(f"   • Форма {form.get('form_index', '?')} ({purpose}): заполнено {filled} полей")
     
     # Проблемы безопасности
-    security_findings = report.get('security_findings', [])
+    security_findings = view.security
     if security_findings:
-        print("\n🔒 ПРОБЛЕМЫ БЕЗОПАСНОСТИ:")
+        lines.append("\n🔒 ПРОБЛЕМЫ БЕЗОПАСНОСТИ:")
         for finding in security_findings:
             finding_type = finding.get('type', 'unknown')
             severity = finding.get('severity', 'unknown')
-            print(f"   • {finding_type} (серьезность: {severity})")
+            lines.append(f"   • {finding_type} (серьезность: {severity})")
     
     # Скрытая функциональность
-    hidden_functionality = report.get('hidden_functionality', [])
+    hidden_functionality = view.hidden
     if hidden_functionality:
-        print("\n🕵️ СКРЫТАЯ ФУНКЦИОНАЛЬНОСТЬ:")
+        lines.append("\n🕵️ СКРЫТАЯ ФУНКЦИОНАЛЬНОСТЬ:")
         for feature in hidden_functionality:
             feature_type = feature.get('type', 'unknown')
             if feature_type == 'hidden_elements':
                 count = feature.get('count', 0)
-                print(f"   • Скрытых элементов: {count}")
+                lines.append(f"   • Скрытых элементов: {count}")
             elif feature_type == 'html_comments':
                 count = len(feature.get('comments', []))
-                print(f"   • HTML комментариев: {count}")
+                lines.append(f"   • HTML комментариев: {count}")
             elif feature_type == 'data_attributes':
                 count = len(feature.get('attributes', []))
-                print(f"   • Data-атрибутов: {count}")
+                lines.append(f"   • Data-атрибутов: {count}")
+    
+    print("\n".join(lines))
 
-def show_detailed_results_menu(report: dict):
+async def show_detailed_results_menu(view: SummaryView):
     """Показывает меню для просмотра детальных результатов"""
     
     while True:
@@ -217,24 +303,24 @@ def show_detailed_results_menu(report: dict):
         print()
         
         try:
-            choice = input("Выберите раздел (1-9): ").strip()
+            choice = (await ainput("Выберите раздел (1-9): ")).strip()
             
             if choice == '1':
-                show_main_page_analysis(report)
+                await show_main_page_analysis(view)
             elif choice == '2':
-                show_registration_attempts(report)
+                await show_registration_attempts(view)
             elif choice == '3':
-                show_form_interactions(report)
+                await show_form_interactions(view)
             elif choice == '4':
-                show_hidden_functionality(report)
+                await show_hidden_functionality(view)
             elif choice == '5':
-                show_user_flows(report)
+                await show_user_flows(view)
             elif choice == '6':
-                show_security_analysis(report)
+                await show_security_analysis(view)
             elif choice == '7':
-                show_performance_analysis(report)
+                await show_performance_analysis(view)
             elif choice == '8':
-                show_full_json_report(report)
+                await show_full_json_report(view)
             elif choice == '9':
                 break
             else:
@@ -244,165 +330,189 @@ def show_detailed_results_menu(report: dict):
             print("\n👋 До свидания!")
             sys.exit(0)
 
-def show_main_page_analysis(report: dict):
+async def show_main_page_analysis(view: SummaryView):
     """Показывает анализ главной страницы"""
-    analysis = report.get('main_page_analysis', {})
+    lines = []
+    analysis = view.main_page_analysis
     
-    print("\n🔍 АНАЛИЗ ГЛАВНОЙ СТРАНИЦЫ:")
-    print("-" * 40)
+    lines.append("\n🔍 АНАЛИЗ ГЛАВНОЙ СТРАНИЦЫ:")
+    lines.append("-" * 40)
     
     if isinstance(analysis, dict):
         for key, value in analysis.items():
-            print(f"{key}: {value}")
+            lines.append(f"{key}: {value}")
     else:
-        print(analysis)
+        lines.append(str(analysis))
     
-    input("\nНажмите Enter для продолжения...")
+    print("\n".join(lines))
+    await ainput("\nНажмите Enter для продолжения...")
 
-def show_registration_attempts(report: dict):
+async def show_registration_attempts(view: SummaryView):
     """Показывает попытки регистрации"""
-    attempts = report.get('registration_attempts', [])
+    lines = []
+    attempts = view.reg_attempts
     
-    print("\n👥 ПОПЫТКИ РЕГИСТРАЦИИ:")
-    print("-" * 40)
+    lines.append("\n👥 ПОПЫТКИ РЕГИСТРАЦИИ:")
+    lines.append("-" * 40)
     
     if not attempts:
-        print("Попыток регистрации не было")
+        lines.append("Попыток регистрации не было")
     else:
         for i, attempt in enumerate(attempts, 1):
-            print(f"\n{i}. Персона: {attempt.get('persona', 'Unknown')}")
-            print(f"   URL формы: {attempt.get('form_url', 'N/A')}")
+            lines.append(f"\n{i}. Персона: {attempt.get('persona', 'Unknown')}")
+            lines.append(f"   URL формы: {attempt.get('form_url', 'N/A')}")
             
-            fill_result = attempt.get('fill_result', {})
-            filled_fields = fill_result.get('filled_fields', [])
-            print(f"   Заполнено полей: {len(filled_fields)}")
+            try:
+                filled_fields = attempt['fill_result']['filled_fields']
+            except KeyError:
+                filled_fields = []
+            lines.append(f"   Заполнено полей: {len(filled_fields)}")
             
             for field in filled_fields:
-                print(f"     • {field.get('field', 'unknown')}: {field.get('value', 'N/A')}")
+                lines.append(f"     • {field.get('field', 'unknown')}: {field.get('value', 'N/A')}")
             
-            submit_result = attempt.get('submit_result', {})
-            success = submit_result.get('success', False)
-            print(f"   Результат отправки: {'✅ Успешно' if success else '❌ Неудачно'}")
-    
-    input("\nНажмите Enter для продолжения...")
+            try:
+                success = attempt['submit_result']['success']
+            except KeyError:
+                success = False
+            lines.append(f"   Результат отправки: {'✅ Успешно' if success else '❌ Неудачно'}")
+    
+    print("\n".join(lines))
+    await ainput("\nНажмите Enter для продолжения...")
 
-def show_form_interactions(report: dict):
+async def show_form_interactions(view: SummaryView):
     """Показывает взаимодействие с формами"""
-    interactions = report.get('form_interactions', [])
+    lines = []
+    interactions = view.form_interactions
     
-    print("\n📝 ВЗАИМОДЕЙСТВИЕ С ФОРМАМИ:")
-    print("-" * 40)
+    lines.append("\n📝 ВЗАИМОДЕЙСТВИЕ С ФОРМАМИ:")
+    lines.append("-" * 40)
     
     if not interactions:
-        print("Форм для взаимодействия не найдено")
+        lines.append("Форм для взаимодействия не найдено")
     else:
         for interaction in interactions:
             form_index = interaction.get('form_index', '?')
             purpose = interaction.get('purpose', 'unknown')
             inputs_count = interaction.get('inputs_count', 0)
             
-            print(f"\nФорма {form_index} ({purpose}):")
-            print(f"   Полей ввода: {inputs_count}")
+            lines.append(f"\nФорма {form_index} ({purpose}):")
+            lines.append(f"   Полей ввода: {inputs_count}")
             
+            # Обычно у результата есть оба поля - берем их одним вызовом itemgetter
             fill_result = interaction.get('fill_result', {})
-            filled_fields = fill_result.get('filled_fields', [])
-            errors = fill_result.get('errors', [])
+            try:
+                filled_fields, errors = _get_filled_and_errors(fill_result)
+            except KeyError:
+                filled_fields = fill_result.get('filled_fields', [])
+                errors = fill_result.get('errors', [])
             
-            print(f"   Заполнено полей: {len(filled_fields)}")
+            lines.append(f"   Заполнено полей: {len(filled_fields)}")
             if errors:
-                print(f"   Ошибок: {len(errors)}")
+                lines.append(f"   Ошибок: {len(errors)}")
     
-    input("\nНажмите Enter для продолжения...")
+    print("\n".join(lines))
+    await ainput("\nНажмите Enter для продолжения...")
 
-def show_hidden_functionality(report: dict):
+async def show_hidden_functionality(view: SummaryView):
     """Показывает скрытую функциональность"""
-    hidden = report.get('hidden_functionality', [])
+    lines = []
+    hidden = view.hidden
     
-    print("\n🕵️ СКРЫТАЯ ФУНКЦИОНАЛЬНОСТЬ:")
-    print("-" * 40)
+    lines.append("\n🕵️ СКРЫТАЯ ФУНКЦИОНАЛЬНОСТЬ:")
+    lines.append("-" * 40)
     
     if not hidden:
-        print("Скрытой функциональности не обнаружено")
+        lines.append("Скрытой функциональности не обнаружено")
     else:
         for feature in hidden:
             feature_type = feature.get('type', 'unknown')
-            print(f"\n• {feature_type.upper()}:")
+            lines.append(f"\n• {feature_type.upper()}:")
             
             if feature_type == 'hidden_elements':
                 elements = feature.get('elements', [])
-                print(f"  Найдено скрытых элементов: {len(elements)}")
+                lines.append(f"  Найдено скрытых элементов: {len(elements)}")
                 for elem in elements[:3]:  # Показываем первые 3
-                    print(f"    - {elem.get('tag', 'unknown')} (class: {elem.get('class', 'none')})")
+                    lines.append(f"    - {elem.get('tag', 'unknown')} (class: {elem.get('class', 'none')})")
             
             elif feature_type == 'html_comments':
                 comments = feature.get('comments', [])
-                print(f"  Найдено комментариев: {len(comments)}")
+                lines.append(f"  Найдено комментариев: {len(comments)}")
                 for comment in comments[:3]:  # Показываем первые 3
-                    print(f"    - {comment[:50]}...")
+                    lines.append(f"    - {comment[:50]}...")
             
             elif feature_type == 'data_attributes':
                 attributes = feature.get('attributes', [])
-                print(f"  Найдено data-атрибутов: {len(attributes)}")
+                lines.append(f"  Найдено data-атрибутов: {len(attributes)}")
                 for attr in attributes[:3]:  # Показываем первые 3
-                    print(f"    - {attr.get('attribute', 'unknown')}: {attr.get('value', 'N/A')}")
+                    lines.append(f"    - {attr.get('attribute', 'unknown')}: {attr.get('value', 'N/A')}")
     
-    input("\nНажмите Enter для продолжения...")
+    print("\n".join(lines))
+    await ainput("\nНажмите Enter для продолжения...")
 
-def show_user_flows(report: dict):
+async def show_user_flows(view: SummaryView):
     """Показывает пользовательские потоки"""
-    flows = report.get('user_flows', [])
+    lines = []
+    flows = view.user_flows
     
-    print("\n🛤️ ПОЛЬЗОВАТЕЛЬСКИЕ ПОТОКИ:")
-    print("-" * 40)
+    lines.append("\n🛤️ ПОЛЬЗОВАТЕЛЬСКИЕ ПОТОКИ:")
+    lines.append("-" * 40)
     
     if not flows:
-        print("Пользовательских потоков не обнаружено")
+        lines.append("Пользовательских потоков не обнаружено")
     else:
         for i, flow in enumerate(flows, 1):
-            print(f"\n{i}. {flow.get('page_title', 'Без названия')}")
-            print(f"   URL: {flow.get('start_url', 'N/A')}")
+            lines.append(f"\n{i}. {flow.get('page_title', 'Без названия')}")
+            lines.append(f"   URL: {flow.get('start_url', 'N/A')}")
             
             interactive = flow.get('interactive_elements', {})
-            buttons = interactive.get('buttons', [])
-            links = interactive.get('links', [])
+            try:
+                buttons, links = _get_buttons_and_links(interactive)
+            except KeyError:
+                buttons = interactive.get('buttons', [])
+                links = interactive.get('links', [])
             
-            print(f"   Кнопок: {len(buttons)}")
-            print(f"   Ссылок: {len(links)}")
+            lines.append(f"   Кнопок: {len(buttons)}")
+            lines.append(f"   Ссылок: {len(links)}")
     
-    input("\nНажмите Enter для продолжения...")
+    print("\n".join(lines))
+    await ainput("\nНажмите Enter для продолжения...")
 
-def show_security_analysis(report: dict):
+async def show_security_analysis(view: SummaryView):
     """Показывает анализ безопасности"""
-    security = report.get('security_findings', [])
+    lines = []
+    security = view.security
     
-    print("\n🔒 АНАЛИЗ БЕЗОПАСНОСТИ:")
-    print("-" * 40)
+    lines.append("\n🔒 АНАЛИЗ БЕЗОПАСНОСТИ:")
+    lines.append("-" * 40)
     
     if not security:
-        print("Проблем безопасности не обнаружено")
+        lines.append("Проблем безопасности не обнаружено")
     else:
         for finding in security:
             finding_type = finding.get('type', 'unknown')
             severity = finding.get('severity', 'unknown')
             
-            print(f"\n• {finding_type.upper()} (серьезность: {severity})")
+            lines.append(f"\n• {finding_type.upper()} (серьезность: {severity})")
             
             if finding_type == 'missing_security_headers':
                 headers = finding.get('headers', [])
-                print(f"  Отсутствующие заголовки: {', '.join(headers)}")
+                lines.append(f"  Отсутствующие заголовки: {', '.join(headers)}")
             
             elif finding_type == 'forms_without_csrf':
                 count = finding.get('count', 0)
-                print(f"  Форм без CSRF защиты: {count}")
+                lines.append(f"  Форм без CSRF защиты: {count}")
     
-    input("\nНажмите Enter для продолжения...")
+    print("\n".join(lines))
+    await ainput("\nНажмите Enter для продолжения...")
 
-def show_performance_analysis(report: dict):
+async def show_performance_analysis(view: SummaryView):
     """Показывает анализ производительности"""
-    performance = report.get('performance_insights', {})
+    lines = []
+    performance = view.performance
     
-    print("\n⚡ АНАЛИЗ ПРОИЗВОДИТЕЛЬНОСТИ:")
-    print("-" * 40)
+    lines.append("\n⚡ АНАЛИЗ ПРОИЗВОДИТЕЛЬНОСТИ:")
+    lines.append("-" * 40)
     
     metrics = performance.get('metrics', {})
     if metrics:
@@ -410,59 +520,65 @@ def show_performance_analysis(report: dict):
         dom_loaded = metrics.get('dom_content_loaded', 0)
         resources = metrics.get('resources_count', 0)
         
-        print(f"Время загрузки страницы: {load_time:.2f} мс")
-        print(f"DOM загружен за: {dom_loaded:.2f} мс")
-        print(f"Количество ресурсов: {resources}")
+        lines.append(f"Время загрузки страницы: {load_time:.2f} мс")
+        lines.append(f"DOM загружен за: {dom_loaded:.2f} мс")
+        lines.append(f"Количество ресурсов: {resources}")
         
         recommendations = performance.get('recommendations', [])
         if recommendations:
-            print("\nРекомендации:")
+            lines.append("\nРекомендации:")
             for rec in recommendations:
-                print(f"  • {rec}")
+                lines.append(f"  • {rec}")
     else:
-        print("Данные о производительности недоступны")
+        lines.append("Данные о производительности недоступны")
     
-    input("\nНажмите Enter для продолжения...")
+    print("\n".join(lines))
+    await ainput("\nНажмите Enter для продолжения...")
 
-def show_full_json_report(report: dict):
+async def show_full_json_report(view: SummaryView):
     """Показывает полный JSON отчет"""
     import json
     
     print("\n📄 ПОЛНЫЙ JSON ОТЧЕТ:")
     print("-" * 40)
-    print(json.dumps(report, ensure_ascii=False, indent=2))
-    input("\nНажмите Enter для продолжения...")
+    # Пишем JSON в stdout по частям, не собирая всю строку в памяти
+    json.dump(view.report, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    await ainput("\nНажмите Enter для продолжения...")
 
 async def main():
     """Главная функция"""
     
     print_banner()
     
+    # DNS демо-сайтов резолвится в фоне, пока пользователь думает над выбором
+    prewarm_task = asyncio.create_task(prewarm_dns(get_demo_sites()))
+    
     while True:
         try:
             display_demo_sites()
-            choice = get_user_choice()
+            choice = await get_user_choice()
             
             # Определяем URL для исследования
             if choice == '5':
-                url = get_custom_url()
+                url = await get_custom_url()
             else:
                 sites = get_demo_sites()
                 url = sites[choice]['url']
             
             # Получаем глубину исследования
-            depth = get_exploration_depth()
+            depth = await get_exploration_depth()
             
             # Запускаем исследование
-            report = await run_smart_exploration(url, depth)
+            view = await run_smart_exploration(url, depth)
             
-            if report:
+            if view:
                 # Показываем детальные результаты
-                show_detailed_results_menu(report)
+                await show_detailed_results_menu(view)
             
             # Спрашиваем, хочет ли пользователь продолжить
             print("\n" + "=" * 50)
-            continue_choice = input("Хотите исследовать другой сайт? (y/n): ").strip().lower()
+            continue_choice = (await ainput("Хотите исследовать другой сайт? (y/n): ")).strip().lower()
             if continue_choice not in ['y', 'yes', 'д', 'да']:
                 break
                 
@@ -472,6 +588,12 @@ async def main():
         except Exception as e:
             print(f"❌ Произошла ошибка: {e}")
             continue
+    
+    prewarm_task.cancel()
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        # Ctrl+C во время ожидания ввода прерывает event loop, а не сам input()
+        print("\n👋 До свидания!") 
\ No newline at end of file
@@ -1,75 +1,606 @@
 import asyncio
+import hashlib
 import random
-import string
-from typing import Dict, List, Any, Optional, Tuple
+import re
+import secrets
+import weakref
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional, Set, Tuple
 from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
-from browser_tool import PlaywrightBrowserTool, PageInfo
+from browser_tool import PlaywrightBrowserTool, PageInfo, BrowserPool
+from llm_cache import CachedChatOpenAI
 from config import Config
+from json_utils import dumps_bytes
 import json
 from datetime import datetime
+from functools import lru_cache
+from urllib.parse import urlsplit
 import os
 import time
-from playwright.async_api import Page, ElementHandle
+from playwright.async_api import Page, ElementHandle, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+# Ключевые слова назначения форм по категориям (порядок категорий = приоритет)
+_FORM_KEYWORDS = {
+    'registration': frozenset({
+        'sign up', 'register', 'create account', 'join', 'get started',
+        'create your account', 'become a member', 'start your journey',
+        'join us', 'create profile', 'new account', 'registration',
+        'create a password', 'create password', 'birthdate', 'birth date',
+        'date of birth', 'age verification'
+    }),
+    'login': frozenset({
+        'sign in', 'login', 'log in', 'enter', 'access account',
+        'welcome back', 'member login', 'user login', 'enter password'
+    }),
+    'contact': frozenset({'contact', 'message', 'email us'}),
+    'search': frozenset({'search'}),
+    'subscription': frozenset({'subscribe', 'newsletter'}),
+}
+_FORM_CATEGORY_ORDER = tuple(_FORM_KEYWORDS)
+
+# Все ключевые слова в одном выражении: именованная группа = категория.
+# Поиск внутри lookahead проверяет каждую позицию текста, поэтому
+# пересекающиеся ключевые слова разных категорий не теряются
+_FORM_KEYWORDS_RE = re.compile('(?=' + '|'.join(
+    f"(?P<{category}>{'|'.join(re.escape(k) for k in sorted(keywords, key=lambda k: (-len(k), k)))})"
+    for category, keywords in _FORM_KEYWORDS.items()
+) + ')', re.IGNORECASE)
+
+# Сколько классифицированных форм помнит агент
+_FORM_PURPOSE_CACHE_SIZE = 10_000
+
+# Допустимые значения назначения формы
+_FORM_PURPOSES = _FORM_CATEGORY_ORDER + ('unknown',)
+
+# Назначения форм, которые считаются формами авторизации
+_AUTH_FORM_PURPOSES = frozenset({'registration', 'login', 'signup', 'signin'})
+# ... и те из них, что собираются при поиске по ссылкам и модальным окнам
+_AUTH_SEARCH_PURPOSES = frozenset({'registration', 'login'})
+
+# Все выражения ниже без учета регистра: проверяемые тексты не копируются через lower()
+_CREATE_PASSWORD_RE = re.compile(r'create (?:a )?password', re.IGNORECASE)
+_REGISTRATION_FIELD_RE = re.compile(r'confirm|first|last|name|phone|birth', re.IGNORECASE)
+_EMAIL_RE = re.compile(r'email', re.IGNORECASE)
+_TERMS_RE = re.compile(r'agree|terms', re.IGNORECASE)
+_UPDATES_RE = re.compile(r'updates', re.IGNORECASE)
+
+# Правила сопоставления полей формы с тестовыми данными (regex по подсказкам поля, ключ данных).
+# Порядок важен: проверяются сверху вниз, побеждает первое совпадение
+_FIELD_RULES = (
+    (re.compile(r'e-?mail'), 'email'),
+    (re.compile(r'(?=.*pass)(?=.*(?:confirm|repeat))', re.DOTALL), 'password_confirm'),
+    (re.compile(r'pass'), 'password'),
+    (re.compile(r'user|login'), 'username'),
+    (re.compile(r'first|fname'), 'first_name'),
+    (re.compile(r'last|lname|surname'), 'last_name'),
+    # Поля с "user" уже отнесены к username выше
+    (re.compile(r'name'), 'name'),
+    (re.compile(r'phone|tel'), 'phone'),
+    (re.compile(r'address'), 'address'),
+    (re.compile(r'city'), 'city'),
+    (re.compile(r'country'), 'country'),
+    (re.compile(r'company|organization'), 'company'),
+    (re.compile(r'age'), 'age'),
+    (re.compile(r'zip|postal'), 'zip'),
+)
+
+# Текст переключателя модального окна на режим регистрации
+_SIGNUP_SWITCH_RE = re.compile(r'sign up|register|create', re.IGNORECASE)
+
+# Теги, среди которых кнопка регистрации ищется по тексту (в порядке приоритета)
+_SIGNUP_TEXT_TAGS = ("button", "[role='button']", "div", "a", "span")
+# ... и переключатель модального окна на регистрацию
+_SWITCH_TEXT_TAGS = ("button", "a", "div", "span")
+
+# Общие селекторы кнопок регистрации (CSS, текст) - проверяются после селекторов конкретной кнопки
+_GENERIC_SIGNUP_SELECTORS = (
+    ("[data-testid*='signup']", None),
+    ("[data-testid*='register']", None),
+    ("[aria-label*='sign up']", None),
+    ("[aria-label*='register']", None),
+    ("button[class*='signup']", None),
+    ("button[class*='register']", None),
+    (".signup-btn", None),
+    (".register-btn", None),
+    ("#signup", None),
+    ("#register", None)
+)
+
+# Общие селекторы переключателя модального окна на регистрацию (CSS, текст)
+_GENERIC_SWITCH_SELECTORS = (
+    ("[data-testid*='switch']", None),
+    ("[data-testid*='signup']", None),
+    ("[data-testid*='register']", None),
+    ("button[class*='switch']", None),
+    (".switch-btn", None)
+)
+
+# Состояние найденных элементов для _click_first_match: видимость, активность и
+# индекс первого вхождения того же элемента (элемент может подходить под несколько селекторов)
+_ELEMENT_STATES_SCRIPT = """
+    (elements) => elements.map(el => {
+        const style = window.getComputedStyle(el);
+        return {
+            first: elements.indexOf(el),
+            visible: el.getClientRects().length > 0 && style.visibility !== 'hidden',
+            enabled: !el.disabled
+        };
+    })
+"""
+
+# Типы полей, которые не заполняются текстом: скрытые поля (CSRF-токены, состояние формы),
+# переключатели, кнопки и выбор файла. Playwright fill() на них падает, поэтому и пакетное
+# заполнение их не трогает
+_UNFILLABLE_INPUT_TYPES = frozenset({'hidden', 'checkbox', 'radio', 'submit', 'button', 'reset', 'image', 'file'})
+
+# Заполнение полей формы для _fill_form_intelligently: значение ставится через сеттер
+# прототипа (его отслеживают React и подобные фреймворки), затем генерируются input и change.
+# Для каждого поля возвращает filled, missing, skipped (тип из skipTypes), disabled
+# или rejected (значение не принято)
+_FILL_FIELDS_SCRIPT = """
+    ({plan, skipTypes}) => {
+        const setValue = Object.getOwnPropertyDescriptor(window.HTMLInputElement.prototype, 'value').set;
+        return plan.map(({sel, val}) => {
+            const el = document.querySelector(sel);
+            if (!el) {
+                return 'missing';
+            }
+            // Тип проверяется и на странице: селектор по имени мог найти другое поле
+            if (skipTypes.includes(el.type)) {
+                return 'skipped';
+            }
+            if (el.disabled || el.readOnly) {
+                return 'disabled';
+            }
+            setValue.call(el, val);
+            el.dispatchEvent(new Event('input', {bubbles: true}));
+            el.dispatchEvent(new Event('change', {bubbles: true}));
+            return el.value === val ? 'filled' : 'rejected';
+        });
+    }
+"""
+
+# Заголовок и интерактивные элементы страницы для _trace_user_flow: первые 3 кнопки
+# и первые 5 ссылок собираются за один проход по общему селектору
+_FLOW_PROBE_SCRIPT = """
+    () => {
+        const buttons = [];
+        const links = [];
+        for (const el of document.querySelectorAll('button, input[type="button"], input[type="submit"], a[href]')) {
+            if (el.localName === 'a') {
+                if (links.length < 5) {
+                    links.push({
+                        text: el.textContent?.trim() || '',
+                        href: el.href
+                    });
+                }
+            } else if (buttons.length < 3) {
+                buttons.push({
+                    text: el.textContent?.trim() || el.value || '',
+                    type: el.type || 'button'
+                });
+            }
+            if (buttons.length >= 3 && links.length >= 5) {
+                break;
+            }
+        }
+        return {title: document.title, buttons, links};
+    }
+"""
+
+# Данные страницы для анализа безопасности и производительности (_collect_page_diagnostics).
+# Аргумент - нужно ли запрашивать заголовки страницы повторно; метрики снимаются
+# до этого запроса, чтобы сам запрос не попал в число ресурсов
+_PAGE_DIAGNOSTICS_SCRIPT = """
+    async (fetchHeaders) => {
+        const navigation = performance.getEntriesByType('navigation')[0];
+        const resources = performance.getEntriesByType('resource');
+        const performanceMetrics = {
+            page_load_time: navigation ? navigation.loadEventEnd - navigation.fetchStart : 0,
+            dom_content_loaded: navigation ? navigation.domContentLoadedEventEnd - navigation.fetchStart : 0,
+            resources_count: resources.length,
+            largest_resource: resources.length > 0 ? Math.max(...resources.map(r => r.transferSize || 0)) : 0
+        };
+        
+        // POST-формы без поля CSRF-токена (все варианты имени поля - одним выражением)
+        const csrfName = /csrf|token|authenticity|nonce|_verify/i;
+        const formsWithoutCsrf = Array.from(document.querySelectorAll('form')).filter(form => {
+            if (form.method.toLowerCase() !== 'post') {
+                return false;
+            }
+            return !Array.from(form.querySelectorAll('input[name]')).some(input => csrfName.test(input.name));
+        }).length;
+        
+        // Заголовки ответа текущей страницы
+        const headers = {};
+        if (fetchHeaders) {
+            try {
+                const response = await fetch(window.location.href);
+                for (let [key, value] of response.headers.entries()) {
+                    headers[key] = value;
+                }
+            } catch (e) {
+                // Заголовки недоступны - остальные данные все равно возвращаются
+            }
+        }
+        
+        return {
+            headers: headers,
+            forms_without_csrf: formsWithoutCsrf,
+            performance: performanceMetrics
+        };
+    }
+"""
+
+# Диагностика кнопок для _debug_page_elements. Вместо проверки всех узлов страницы
+# берутся только кандидаты: элементы с подходящими aria-label/data-testid и
+# кликабельные элементы, текст которых содержит искомую строку. Текст сравнивается
+# XPath-выражением в движке браузера (translate - регистр латиницы и кириллицы)
+_DEBUG_ELEMENTS_SCRIPT = """
+    (searchText) => {
+        const upper = 'ABCDEFGHIJKLMNOPQRSTUVWXYZАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ';
+        const lower = upper.toLowerCase();
+        // Строковый литерал XPath 1.0: без экранирования, кавычки собираются через concat
+        const literal = value => !value.includes('"') ? `"${value}"` :
+            !value.includes("'") ? `'${value}'` :
+            'concat(' + value.split('"').map(part => `"${part}"`).join(`, '"', `) + ')';
+        const needle = literal(searchText.toLowerCase());
+        const lowered = expr => `translate(${expr}, '${upper}', '${lower}')`;
+        
+        const quoted = CSS.escape(searchText);
+        const byAttribute = document.querySelectorAll(
+            `[aria-label*="${quoted}" i], [data-testid*="signup" i], [data-testid*="register" i]`
+        );
+        const byText = document.evaluate(
+            '//*[self::button or self::a or self::label or self::span or @role="button" or ' +
+            '(self::input and (@type="submit" or @type="button"))]' +
+            `[contains(${lowered('.')}, ${needle}) or contains(${lowered('@value')}, ${needle})]`,
+            document, null, XPathResult.ORDERED_NODE_ITERATOR_TYPE, null
+        );
+        
+        const matches = new Set();
+        for (const el of byAttribute) {
+            if (matches.size >= 10) break;
+            matches.add(el);
+        }
+        let el;
+        while (matches.size < 10 && (el = byText.iterateNext())) {
+            matches.add(el);
+        }
+        
+        return Array.from(matches, el => {
+            const rect = el.getBoundingClientRect();
+            const style = window.getComputedStyle(el);
+            
+            return {
+                tagName: el.tagName,
+                text: el.textContent?.trim().substring(0, 50) || '',
+                className: el.className || '',
+                id: el.id || '',
+                dataTestId: el.getAttribute('data-testid') || '',
+                ariaLabel: el.getAttribute('aria-label') || '',
+                visible: rect.width > 0 && rect.height > 0,
+                display: style.display,
+                visibility: style.visibility,
+                opacity: style.opacity,
+                zIndex: style.zIndex,
+                position: style.position,
+                top: rect.top,
+                left: rect.left,
+                width: rect.width,
+                height: rect.height,
+                inViewport: rect.top >= 0 && rect.left >= 0 && 
+                           rect.bottom <= window.innerHeight && 
+                           rect.right <= window.innerWidth
+            };
+        });
+    }
+"""
+
+# Важные заголовки безопасности (в нижнем регистре)
+_SECURITY_HEADERS = frozenset({
+    'x-frame-options',
+    'x-content-type-options',
+    'x-xss-protection',
+    'strict-transport-security',
+    'content-security-policy'
+})
+
+# Правила рекомендаций по производительности: (метрика, порог, рекомендация)
+_PERFORMANCE_RULES = (
+    ('page_load_time', 3000, "Page load time is over 3 seconds - consider optimization"),
+    ('resources_count', 50, "High number of resources - consider bundling and minification"),
+    ('largest_resource', 1_000_000, "Large resources detected - consider compression and lazy loading"),  # 1MB
+)
+
+# Кнопка отправки формы для _submit_form_safely
+_SUBMIT_BUTTON_SELECTOR = (
+    "input[type='submit'], button[type='submit'], button:has-text('Submit'), "
+    "button:has-text('Register'), button:has-text('Sign up')"
+)
+
+# Сообщения об успехе и ошибке в видимом тексте страницы после отправки формы.
+# Выполняется в браузере: передается только результат, а не весь HTML
+_SUBMIT_MESSAGES_SCRIPT = """
+    () => {
+        const text = (document.body ? document.body.innerText : '').toLowerCase();
+        return {
+            success: /success|welcome|registered|created|thank you/.test(text),
+            error: /error|invalid|failed|required|already exists/.test(text)
+        };
+    }
+"""
+
+def _css_string(value: str) -> str:
+    """Строка в кавычках для CSS-селектора (кавычки и обратные слеши экранируются)"""
+    return json.dumps(value, ensure_ascii=False)
+
+def _fit_max_length(value: Optional[str], max_length: Optional[int]) -> Optional[str]:
+    """Укорачивает значение до maxlength поля; у email сокращается часть до @, чтобы адрес остался валидным"""
+    if not value or not max_length or len(value) <= max_length:
+        return value
+    local, at, domain = value.rpartition('@')
+    if at and local and len(domain) + 2 <= max_length:
+        return local[:max_length - len(domain) - 1] + at + domain
+    return value[:max_length]
+
+def _write_report_file(filename: str, data: bytes):
+    """Записывает отчет на диск, создавая директорию при необходимости"""
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'wb') as f:
+        f.write(data)
+
+# Разбор URL с кэшем: одни и те же ссылки разбираются для нескольких ключей
+_split_url = lru_cache(maxsize=1024)(urlsplit)
+
+def _flow_url_key(url: str) -> str:
+    """Ключ ссылки для отбора разных адресов: без фрагмента и query, без учета регистра"""
+    return _split_url(url)._replace(query='', fragment='').geturl().lower()
+
+def _flow_template_key(url: str) -> str:
+    """Шаблон страницы для ссылки: хост и путь, в котором числа заменены на #"""
+    parts = _split_url(url)
+    return parts.netloc.lower() + re.sub(r'\d+', '#', parts.path.lower())
+
+def _css_class(name: str) -> str:
+    """Селектор класса с экранированием символов, недопустимых в CSS-идентификаторе"""
+    escaped = re.sub(r'([^\w-])', r'\\\1', name)
+    if escaped[:1].isdigit():
+        escaped = f"\\3{escaped[0]} {escaped[1:]}"
+    return '.' + escaped
+
+# Состояние форм на странице (JS-выражение): меняется, когда форма появляется,
+# исчезает, становится видимой или меняет поля - например, при открытии модального окна
+_FORMS_STATE_JS = """Array.from(document.forms, f => [
+        f.elements.length, f.textContent.length, f.getClientRects().length > 0 ? 1 : 0
+    ].join(':')).join('|')"""
+
+# Формы на странице с полями ввода и окружающим текстом (JS-выражение)
+_FORMS_JS = """Array.from(document.querySelectorAll('form')).map((form, index) => {
+        const inputs = Array.from(form.querySelectorAll('input, select, textarea')).map(input => ({
+            name: input.name || '',
+            type: input.type || 'text',
+            required: input.required || false,
+            placeholder: input.placeholder || '',
+            ...(input.maxLength > 0 ? {maxLength: input.maxLength} : {})
+        }));
+        
+        return {
+            index: index + 1,
+            action: form.action || '',
+            method: form.method || 'GET',
+            inputs: inputs,
+            form_text: form.textContent?.trim().substring(0, 200) || '',
+            nearby_text: form.parentElement?.textContent?.trim().substring(0, 300) || ''
+        };
+    })"""
+
+# Переключатели режима вход/регистрация в модальном окне (JS-выражение)
+_MODE_SWITCHES_JS = """Array.from(document.querySelectorAll('button, a, [role="button"], [role="tab"]'))
+        .filter(el => /sign up|register|create|join/i.test(el.textContent))
+        .map(el => ({
+            text: el.textContent.trim(),
+            tagName: el.tagName,
+            className: el.className,
+            href: el.href || '',
+            role: el.getAttribute('role') || ''
+        }))"""
+
+# Пользовательские персоны для тестирования. Создаются один раз при импорте
+# и доступны только для чтения, поэтому разделяются всеми экземплярами агента
+_PERSONAS = (
+    MappingProxyType({
+        "name": "regular_user",
+        "email_prefix": "testuser",
+        "first_name": "John",
+        "last_name": "Doe",
+        "age": "25",
+        "phone": "+1234567890",
+        "address": "123 Main St",
+        "city": "New York",
+        "country": "USA",
+        "company": "Test Corp",
+        "behavior": "cautious"  # осторожный пользователь
+    }),
+    MappingProxyType({
+        "name": "power_user",
+        "email_prefix": "poweruser",
+        "first_name": "Jane",
+        "last_name": "Smith",
+        "age": "35",
+        "phone": "+1987654321",
+        "address": "456 Oak Ave",
+        "city": "San Francisco",
+        "country": "USA",
+        "company": "Tech Solutions",
+        "behavior": "aggressive"  # активный пользователь
+    }),
+    MappingProxyType({
+        "name": "edge_case_user",
+        "email_prefix": "edgeuser",
+        "first_name": "Александр",  # Unicode имя
+        "last_name": "O'Connor-Smith",  # Сложная фамилия
+        "age": "99",
+        "phone": "+7-800-555-0199",
+        "address": "Улица Пушкина, дом Колотушкина",
+        "city": "Москва",
+        "country": "Россия",
+        "company": "ООО 'Тест & Ко'",
+        "behavior": "boundary_testing"  # граничные случаи
+    })
+)
+
+# Неизменная часть данных для контактных форм и форм подписки: при каждом вызове
+# копируется шаблон, а заново создается только email
+_CONTACT_DATA_TEMPLATE = MappingProxyType({
+    "name": "Test User",
+    "subject": "Test inquiry from automated testing",
+    "message": "This is a test message generated by automated testing system. Please ignore.",
+    "phone": "+1234567890",
+    "company": "Test Company"
+})
+_SUBSCRIPTION_DATA_TEMPLATE = MappingProxyType({
+    "newsletter": "true"
+})
+
+# Кэширующие клиенты LLM, общие для всех агентов исследования: запросы идут через один
+# пул HTTP-соединений, а не через отдельный клиент (и TLS-сессии) каждого агента.
+# Асинхронный HTTP-клиент ChatOpenAI привязан к event loop, в котором он начал работу,
+# поэтому клиент свой для каждого цикла (smart_demo и тесты вызывают asyncio.run
+# несколько раз); клиент удаляется вместе со своим циклом
+_shared_llms: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, CachedChatOpenAI]" = weakref.WeakKeyDictionary()
+
+def _get_shared_llm() -> CachedChatOpenAI:
+    """Возвращает общий клиент LLM текущего event loop, создавая его при первом обращении"""
+    loop = asyncio.get_running_loop()
+    llm = _shared_llms.get(loop)
+    if llm is None:
+        llm = _shared_llms[loop] = CachedChatOpenAI(ChatOpenAI(
+            temperature=0.3,  # Немного больше креативности для исследования
+            api_key=Config.OPENAI_API_KEY,
+            model="gpt-4o-mini"
+        ), max_temperature=0.3)
+    return llm
 
 class SmartExplorationAgent:
     """Умный агент для глубокого исследования веб-сайтов"""
     
-    def __init__(self):
+    # Скрипты для page.evaluate: каждый собирает все нужные данные за один вызов,
+    # вместо отдельного обмена с браузером на каждый вид элементов
+    _AUTH_ELEMENTS_SCRIPT = """
+        () => {
+            // Выражения без учета регистра создаются один раз, а не для каждого элемента
+            const authText = /sign up|register|login|sign in/i;
+            const authHref = /register|login|signup|signin/i;
+            
+            // Ссылки на регистрацию/вход
+            const links = Array.from(document.querySelectorAll('a[href]'))
+                .filter(link => authText.test(link.textContent) || authHref.test(link.href))
+                .map(link => ({
+                    href: link.href,
+                    text: link.textContent.trim()
+                }));
+            
+            // Расширенный список ключевых слов для регистрации
+            // (для data-testid, классов и id - без первого пробела)
+            const signupText = /sign up|signup|register|registration|join|create account|get started|start free|join now|create|new account/i;
+            const signupAttr = /signup|register|registration|join|createaccount|getstarted|startfree|joinnow|create|newaccount/i;
+            
+            // Кнопки регистрации (могут открывать модальные окна)
+            const buttons = Array.from(document.querySelectorAll('button, [role="button"], .btn, input[type="button"], a, div[onclick], span[onclick]'))
+                .filter(btn =>
+                    signupText.test(btn.textContent) ||
+                    signupText.test(btn.getAttribute('aria-label') || '') ||
+                    signupAttr.test(btn.getAttribute('data-testid') || '') ||
+                    signupAttr.test(btn.getAttribute('class') || '') ||
+                    signupAttr.test(btn.id || '')
+                )
+                .map(btn => ({
+                    text: btn.textContent.trim(),
+                    tagName: btn.tagName,
+                    className: btn.className,
+                    dataTestId: btn.getAttribute('data-testid') || '',
+                    ariaLabel: btn.getAttribute('aria-label') || '',
+                    id: btn.id || '',
+                    href: btn.href || ''
+                }));
+            
+            return { links, buttons };
+        }
+    """
+    _MODAL_STATE_SCRIPT = "() => ({ forms: " + _FORMS_JS + ", switches: " + _MODE_SWITCHES_JS + " })"
+    _FORMS_SCRIPT = "() => " + _FORMS_JS
+    _FORMS_STATE_SCRIPT = "() => " + _FORMS_STATE_JS
+    
+    # Те же скрипты регистрируются во вкладках как init-скрипт window.__aiWebTesterAuth:
+    # браузер разбирает их один раз на документ, а по CDP передается только имя функции
+    _PAGE_SCRIPTS = {
+        "authElements": _AUTH_ELEMENTS_SCRIPT,
+        "modalState": _MODAL_STATE_SCRIPT,
+        "forms": _FORMS_SCRIPT,
+        "formsState": _FORMS_STATE_SCRIPT
+    }
+    _PAGE_SCRIPTS_INIT = "window.__aiWebTesterAuth = {" + ", ".join(
+        f"{name}: {script.strip()}" for name, script in _PAGE_SCRIPTS.items()
+    ) + "};"
+    
+    def __init__(self, browser_pool: Optional[BrowserPool] = None, debug: bool = False):
         Config.validate()
-        self.llm = ChatOpenAI(
-            temperature=0.3,  # Немного больше креативности для исследования
-            api_key=Config.OPENAI_API_KEY,
-            model="gpt-4o-mini"
-        )
-        self.browser_tool = PlaywrightBrowserTool()
+        # Подробный вывод по каждому элементу-кандидату и ожидаемым ошибкам клика
+        self.debug = debug
+        # Глубокий анализ одной и той же страницы переиспользуется между запусками,
+        # поэтому кэш разрешен и для температуры исследования
+        # С пулом каждое исследование берет готовый контекст из уже запущенного браузера
+        self.browser_tool = PlaywrightBrowserTool(pool=browser_pool, init_scripts=(self._PAGE_SCRIPTS_INIT,))
+        self._owns_pool = False
         self.session_data = {}  # Данные сессии для сохранения состояния
         self.discovered_pages = set()  # Обнаруженные страницы
-        self.user_personas = self._create_user_personas()
+        # Назначение форм по их сигнатуре; ограничено, т.к. агент может исследовать много сайтов подряд
+        self._form_purpose_cache: "OrderedDict[str, str]" = OrderedDict()
+        self.user_personas = _PERSONAS
         
-    def _create_user_personas(self) -> List[Dict[str, Any]]:
-        """Создает различные пользовательские персоны для тестирования"""
-        return [
-            {
-                "name": "regular_user",
-                "email_prefix": "testuser",
-                "first_name": "John",
-                "last_name": "Doe",
-                "age": "25",
-                "phone": "+1234567890",
-                "address": "123 Main St",
-                "city": "New York",
-                "country": "USA",
-                "company": "Test Corp",
-                "behavior": "cautious"  # осторожный пользователь
-            },
-            {
-                "name": "power_user",
-                "email_prefix": "poweruser",
-                "first_name": "Jane",
-                "last_name": "Smith",
-                "age": "35",
-                "phone": "+1987654321",
-                "address": "456 Oak Ave",
-                "city": "San Francisco",
-                "country": "USA",
-                "company": "Tech Solutions",
-                "behavior": "aggressive"  # активный пользователь
-            },
-            {
-                "name": "edge_case_user",
-                "email_prefix": "edgeuser",
-                "first_name": "Александр",  # Unicode имя
-                "last_name": "O'Connor-Smith",  # Сложная фамилия
-                "age": "99",
-                "phone": "+7-800-555-0199",
-                "address": "Улица Пушкина, дом Колотушкина",
-                "city": "Москва",
-                "country": "Россия",
-                "company": "ООО 'Тест & Ко'",
-                "behavior": "boundary_testing"  # граничные случаи
-            }
-        ]
+    async def __aenter__(self):
+        await self.start()
+        return self
+        
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+    
+    @property
+    def llm(self) -> CachedChatOpenAI:
+        """Кэширующий клиент LLM текущего event loop (см. _get_shared_llm)"""
+        return _get_shared_llm()
+    
+    async def start(self):
+        """Прогревает браузер для серии исследований
+        
+        Если пул не передан в конструктор, агент создает свой пул из одного
+        контекста: браузер запускается один раз, а каждое исследование
+        получает из пула свой новый контекст.
+        """
+        if self.browser_tool.pool is None:
+            self.browser_tool.pool = BrowserPool(size=1)
+            self._owns_pool = True
+        await self.browser_tool.pool.start()
+    
+    async def close(self):
+        """Закрывает браузер, если агент сам его запускал"""
+        if self._owns_pool:
+            await self.browser_tool.pool.close()
+            self.browser_tool.pool = None
+            self._owns_pool = False
+    
+    def reset_session(self):
+        """Сбрасывает накопленное состояние агента между исследованиями разных сайтов"""
+        self.session_data.clear()
+        self.discovered_pages.clear()
+        self._form_purpose_cache.clear()
+    
+    def _create_user_personas(self) -> Tuple[Mapping[str, Any], ...]:
+        """Возвращает пользовательские персоны для тестирования (общие для всех агентов)"""
+        return _PERSONAS
     
     async def deep_explore_website(self, url: str, max_depth: int = 3) -> Dict[str, Any]:
         """Глубокое исследование веб-сайта с попытками регистрации и взаимодействия"""
@@ -104,9 +635,15 @@ class SmartExplorationAgent:
             
             # Этап 3: Попытки регистрации с разными персонами
             print("👥 Этап 3: Попытки регистрации с разными пользователями...")
-            for persona in self.user_personas:
-                registration_result = await self._attempt_registration(auth_forms, persona)
-                if registration_result:
+            # Каждая персона работает в своем контексте браузера, поэтому попытки идут параллельно
+            registration_results = await asyncio.gather(
+                *[self._attempt_registration_in_context(auth_forms, persona, url) for persona in self.user_personas],
+                return_exceptions=True
+            )
+            for persona, registration_result in zip(self.user_personas, registration_results):
+                if isinstance(registration_result, Exception):
+                    print(f"⚠️ Ошибка при регистрации {persona['name']}: {registration_result}")
+                elif registration_result:
                     exploration_report["registration_attempts"].append(registration_result)
             
             # Этап 4: Исследование всех доступных форм
@@ -124,14 +661,21 @@ class SmartExplorationAgent:
             user_flows = await self._analyze_user_flows(main_page, max_depth)
             exploration_report["user_flows"] = user_flows
             
+            # Данные страницы для этапов 7 и 8 собираются одним вызовом; если не удалось,
+            # каждый этап попробует собрать их сам и запишет ошибку в свой раздел отчета
+            try:
+                diagnostics = await self._collect_page_diagnostics()
+            except Exception:
+                diagnostics = None
+            
             # Этап 7: Проверка безопасности
             print("🔒 Этап 7: Анализ безопасности...")
-            security_findings = await self._security_analysis()
+            security_findings = await self._security_analysis(diagnostics)
             exploration_report["security_findings"] = security_findings
             
             # Этап 8: Анализ производительности
             print("⚡ Этап 8: Анализ производительности...")
-            performance_insights = await self._performance_analysis()
+            performance_insights = await self._performance_analysis(diagnostics)
             exploration_report["performance_insights"] = performance_insights
             
             # Сохраняем отчет
@@ -147,43 +691,63 @@ class SmartExplorationAgent:
     async def _analyze_page_deeply(self, page_info: PageInfo) -> Dict[str, Any]:
         """Глубокий анализ страницы с помощью AI"""
         
-        prompt = f"""
-        Perform a deep analysis of this web page for intelligent exploration:
+        # Срез делается только если текст длиннее превью; окружающий текст форм
+        # сокращается - модели достаточно начала, а каждый символ стоит токенов
+        content = page_info.content
+        content_preview = content[:3000] if len(content) > 3000 else content
+        forms = [
+            {**form, "nearby_text": form.get("nearby_text", "")[:100]} if len(form.get("nearby_text", "")) > 100 else form
+            for form in page_info.forms
+        ]
         
-        URL: {page_info.url}
-        Title: {page_info.title}
+        # Ключ кэша - все данные страницы, из которых собирается промпт
+        key_data = {
+            "task": "deep_analysis",
+            "url": page_info.url,
+            "title": page_info.title,
+            "content": content_preview,
+            "links_count": len(page_info.links),
+            "forms": forms
+        }
         
-        Content preview: {page_info.content[:3000]}
+        def build_messages():
+            prompt = f"""
+            Perform a deep analysis of this web page for intelligent exploration:
         
-        Forms found: {len(page_info.forms)}
-        Links found: {len(page_info.links)}
+            URL: {page_info.url}
+            Title: {page_info.title}
         
-        Forms details:
-        {json.dumps(page_info.forms, ensure_ascii=False, indent=2)}
+            Content preview: {content_preview}
         
-        Analyze and identify:
-        1. Site purpose and main functionality
-        2. User registration/login opportunities
-        3. Interactive elements that need testing
-        4. Potential hidden or advanced features
-        5. Security considerations
-        6. Areas that might require authentication
-        7. E-commerce or transaction capabilities
-        8. Social features or user-generated content
-        9. API endpoints or AJAX functionality
-        10. Mobile/responsive considerations
+            Forms found: {len(page_info.forms)}
+            Links found: {len(page_info.links)}
         
-        Provide specific recommendations for intelligent exploration and testing.
+            Forms details:
+            {json.dumps(forms, ensure_ascii=False, separators=(',', ':'))}
         
-        Respond in JSON format with detailed analysis and actionable recommendations.
-        """
+            Analyze and identify:
+            1. Site purpose and main functionality
+            2. User registration/login opportunities
+            3. Interactive elements that need testing
+            4. Potential hidden or advanced features
+            5. Security considerations
+            6. Areas that might require authentication
+            7. E-commerce or transaction capabilities
+            8. Social features or user-generated content
+            9. API endpoints or AJAX functionality
+            10. Mobile/responsive considerations
         
-        messages = [
-            SystemMessage(content="You are an expert web application security tester and UX researcher. Provide detailed, actionable insights for comprehensive website exploration."),
-            HumanMessage(content=prompt)
-        ]
+            Provide specific recommendations for intelligent exploration and testing.
         
-        response = self.llm.invoke(messages)
+            Respond in JSON format with detailed analysis and actionable recommendations.
+            """
+        
+            return [
+                SystemMessage(content="You are an expert web application security tester and UX researcher. Provide detailed, actionable insights for comprehensive website exploration."),
+                HumanMessage(content=prompt)
+            ]
+        
+        response = await self.llm.ainvoke_lazy(key_data, build_messages)
         
         try:
             return json.loads(response.content)
@@ -194,11 +758,15 @@ class SmartExplorationAgent:
         """Обнаруживает формы аутентификации (регистрация, вход)"""
         
         auth_forms = []
-        
-        # Анализируем существующие формы
-        for form in page_info.forms:
-            form_purpose = await self._classify_form_purpose(form)
-            if form_purpose in ['registration', 'login', 'signup', 'signin']:
+        # Уже найденные формы: (источник, назначение, структура). Одна и та же форма
+        # встречается повторно после каждого клика и на разных ссылках
+        seen = set()
+        
+        # Анализируем существующие формы (все сразу, см. _classify_forms_batch)
+        form_purposes = await self._classify_forms_batch(page_info.forms)
+        for form, form_purpose in zip(page_info.forms, form_purposes):
+            if form_purpose in _AUTH_FORM_PURPOSES and \
+                    self._mark_seen(seen, "main_page", form_purpose, form):
                 auth_forms.append({
                     "form": form,
                     "purpose": form_purpose,
@@ -206,151 +774,199 @@ class SmartExplorationAgent:
                 })
         
         # Ищем дополнительные формы на странице
-        additional_forms = await self._search_for_auth_links()
+        additional_forms = await self._search_for_auth_links(seen)
         auth_forms.extend(additional_forms)
         
         return auth_forms
     
-    async def _classify_form_purpose(self, form: Dict[str, Any]) -> str:
-        """Классифицирует назначение формы с помощью AI"""
+    async def _classify_forms_batch(self, forms: List[Dict[str, Any]]) -> List[str]:
+        """Классифицирует назначение списка форм
+        
+        Назначение определяет эвристика. Если включен Config.FORM_PURPOSE_LLM_FALLBACK,
+        формы, которые она не распознала, отправляются в LLM одним запросом для всех
+        сразу; если ответ не удалось разобрать, для них остается результат эвристики.
+        """
+        
+        purposes = [self._classify_form_purpose(form) for form in forms]
+        if not Config.FORM_PURPOSE_LLM_FALLBACK:
+            return purposes
+        # Одинаковые формы (с одной сигнатурой) отправляются в LLM один раз
+        unknown_by_signature: Dict[str, List[int]] = {}
+        for i, purpose in enumerate(purposes):
+            if purpose == 'unknown':
+                unknown_by_signature.setdefault(self._form_signature(forms[i]), []).append(i)
+        if not unknown_by_signature:
+            return purposes
+        unknown = [indices[0] for indices in unknown_by_signature.values()]
+        
+        descriptions = [
+            {
+                "id": n,
+                "text": f"{forms[i].get('form_text', '')} {forms[i].get('nearby_text', '')}".strip()[:300],
+                "inputs": [
+                    {"type": inp.get('type', ''), "name": inp.get('name', ''), "placeholder": inp.get('placeholder', '')}
+                    for inp in forms[i].get('inputs', [])
+                ]
+            }
+            for n, i in enumerate(unknown, 1)
+        ]
+        
+        def build_messages():
+            prompt = f"""
+            Classify the purpose of each of the following {len(descriptions)} web forms.
+            Allowed labels: {', '.join(_FORM_PURPOSES)}.
+            
+            Forms:
+            {json.dumps(descriptions, ensure_ascii=False, indent=2)}
+            
+            Respond with a JSON object {{"purposes": [...]}} containing exactly {len(descriptions)} labels, in the same order as the forms.
+            """
+            return [
+                SystemMessage(content="You are a web UI analyst. Classify HTML forms by purpose. Respond in JSON."),
+                HumanMessage(content=prompt)
+            ]
+        
+        try:
+            response = await self.llm.ainvoke_lazy(
+                {"task": "form_purposes", "forms": descriptions}, build_messages,
+                response_format={"type": "json_object"}
+            )
+            labels = json.loads(response.content).get("purposes")
+        except Exception as e:
+            print(f"⚠️ Не удалось классифицировать формы через AI: {e}")
+            return purposes
+        
+        if not isinstance(labels, list) or len(labels) != len(unknown) or \
+                not all(label in _FORM_PURPOSES for label in labels):
+            print("⚠️ AI вернул некорректную классификацию форм, используем эвристику")
+            return purposes
+        
+        for (signature, indices), label in zip(unknown_by_signature.items(), labels):
+            self._remember_form_purpose(signature, label)
+            for i in indices:
+                purposes[i] = label
+        return purposes
+    
+    @staticmethod
+    def _mark_seen(seen: Set[Tuple], source: str, purpose: str, form: Dict[str, Any]) -> bool:
+        """Запоминает форму; возвращает False, если такая форма из этого источника уже была
+        
+        Формы сравниваются по структуре (action, method, имена и типы полей) вместе
+        с назначением, чтобы похожие формы входа и регистрации не склеивались.
+        """
+        
+        key = (
+            source,
+            purpose,
+            form.get('action', ''),
+            form.get('method', ''),
+            tuple((i.get('name', ''), i.get('type', '')) for i in form.get('inputs', []))
+        )
+        if key in seen:
+            return False
+        seen.add(key)
+        return True
+    
+    @staticmethod
+    def _form_signature(form: Dict[str, Any]) -> str:
+        """Стабильный ключ формы: тексты и поля ввода, от которых зависит классификация"""
+        
+        signature = {
+            't': form.get('form_text', ''),
+            'n': form.get('nearby_text', ''),
+            'i': [(i.get('type'), i.get('name'), i.get('placeholder')) for i in form.get('inputs', [])]
+        }
+        return hashlib.blake2b(json.dumps(signature, sort_keys=True).encode(), digest_size=16).hexdigest()
+    
+    def _classify_form_purpose(self, form: Dict[str, Any]) -> str:
+        """Классифицирует назначение формы (результат кэшируется по структуре формы)
+        
+        Одни и те же формы классифицируются повторно после каждого клика
+        и переключения режима, поэтому повторные вызовы берутся из кэша.
+        """
+        
+        key = self._form_signature(form)
+        purpose = self._form_purpose_cache.get(key)
+        if purpose is None:
+            purpose = self._classify_form_heuristic(form)
+            self._remember_form_purpose(key, purpose)
+        else:
+            self._form_purpose_cache.move_to_end(key)
+        return purpose
+    
+    def _remember_form_purpose(self, key: str, purpose: str):
+        """Кладет назначение формы в кэш, вытесняя давно неиспользуемые записи"""
+        self._form_purpose_cache[key] = purpose
+        self._form_purpose_cache.move_to_end(key)
+        while len(self._form_purpose_cache) > _FORM_PURPOSE_CACHE_SIZE:
+            self._form_purpose_cache.popitem(last=False)
+    
+    def _classify_form_heuristic(self, form: Dict[str, Any]) -> str:
+        """Определяет назначение формы по ключевым словам и полям ввода"""
         
         form_text = form.get('form_text', '') + ' ' + form.get('nearby_text', '')
         inputs = form.get('inputs', [])
         buttons = form.get('buttons', [])
         
-        # Простая эвристика
-        text_lower = form_text.lower()
-        
-        # Проверяем ключевые слова для регистрации
-        registration_keywords = [
-            'sign up', 'register', 'create account', 'join', 'get started',
-            'create your account', 'become a member', 'start your journey',
-            'join us', 'create profile', 'new account', 'registration',
-            'create a password', 'create password', 'birthdate', 'birth date',
-            'date of birth', 'age verification'
-        ]
+        # Простая эвристика (выражения без учета регистра, см. _FORM_KEYWORDS_RE)
         
-        # Проверяем ключевые слова для входа
-        login_keywords = [
-            'sign in', 'login', 'log in', 'enter', 'access account',
-            'welcome back', 'member login', 'user login', 'enter password'
-        ]
-        
-        if any(keyword in text_lower for keyword in registration_keywords):
-            return 'registration'
-        elif any(keyword in text_lower for keyword in login_keywords):
-            return 'login'
-        elif any(keyword in text_lower for keyword in ['contact', 'message', 'email us']):
-            return 'contact'
-        elif any(keyword in text_lower for keyword in ['search']):
-            return 'search'
-        elif any(keyword in text_lower for keyword in ['subscribe', 'newsletter']):
-            return 'subscription'
+        # Один проход по тексту находит ключевые слова всех категорий сразу
+        hits = {m.lastgroup for m in _FORM_KEYWORDS_RE.finditer(form_text)}
+        for category in _FORM_CATEGORY_ORDER:
+            if category in hits:
+                return category
         
         # Анализ полей ввода для более точной классификации
+        # Типы сравниваются целиком, поэтому в нижний регистр приводятся только они
         input_types = [inp.get('type', '').lower() for inp in inputs]
-        input_names = [inp.get('name', '').lower() for inp in inputs]
-        input_placeholders = [inp.get('placeholder', '').lower() for inp in inputs]
+        input_placeholders = [inp.get('placeholder', '') for inp in inputs]
         
-        all_input_text = ' '.join(input_names + input_placeholders).lower()
+        all_input_text = ' '.join([inp.get('name', '') for inp in inputs] + input_placeholders)
         
         # Специальная проверка для Pinterest-подобных форм
         # Если есть placeholder "create a password" или "create password" - это регистрация
-        for placeholder in input_placeholders:
-            if any(keyword in placeholder for keyword in ['create a password', 'create password']):
-                return 'registration'
+        # (плейсхолдеры склеиваются через перевод строки, чтобы совпадение не шло через границу полей)
+        if _CREATE_PASSWORD_RE.search('\n'.join(input_placeholders)):
+            return 'registration'
         
         # Если есть поля пароля и email
-        if 'password' in input_types and ('email' in input_types or 'email' in all_input_text):
-            # Проверяем признаки регистрации
-            registration_indicators = [
-                'confirm' in all_input_text,  # подтверждение пароля
-                'first' in all_input_text,    # имя
-                'last' in all_input_text,     # фамилия
-                'name' in all_input_text,     # имя
-                'phone' in all_input_text,    # телефон
-                'birth' in all_input_text,    # дата рождения
-                'date' in input_types,        # поле даты (обычно для дня рождения)
-                'agree' in text_lower,        # согласие с условиями
-                'terms' in text_lower,        # условия использования
+        if 'password' in input_types and ('email' in input_types or _EMAIL_RE.search(all_input_text)):
+            # Проверяем признаки регистрации: от дешевых к дорогим, до первого совпадения
+            is_registration = (
                 len(inputs) > 2               # больше 2 полей обычно = регистрация
-            ]
+                or 'date' in input_types      # поле даты (обычно для дня рождения)
+                # подтверждение пароля, имя, фамилия, телефон, дата рождения
+                or _REGISTRATION_FIELD_RE.search(all_input_text) is not None
+                or _TERMS_RE.search(form_text) is not None  # согласие с условиями использования
+            )
             
-            if any(registration_indicators):
-                return 'registration'
-            else:
-                return 'login'
+            return 'registration' if is_registration else 'login'
         
         # Если только email без пароля - возможно подписка
         if 'email' in input_types and 'password' not in input_types:
-            if any(keyword in text_lower for keyword in ['subscribe', 'newsletter', 'updates']):
+            # 'subscribe' и 'newsletter' уже обработаны проверкой ключевых слов выше
+            if _UPDATES_RE.search(form_text):
                 return 'subscription'
         
         return 'unknown'
     
-    async def _search_for_auth_links(self) -> List[Dict[str, Any]]:
-        """Ищет ссылки на страницы регистрации/входа и кнопки для модальных окон"""
+    async def _search_for_auth_links(self, seen: Optional[Set[Tuple]] = None, page: Optional[Page] = None) -> List[Dict[str, Any]]:
+        """Ищет ссылки на страницы регистрации/входа и кнопки для модальных окон
         
+        seen - отпечатки уже найденных форм (см. _mark_seen), повторы не добавляются
+        page - страница для поиска (по умолчанию основная страница браузера)
+        """
+        
+        page = page or self.browser_tool.page
         auth_forms = []
+        seen = set() if seen is None else seen
         
         try:
-            # Ищем ссылки на регистрацию/вход
-            auth_links = await self.browser_tool.page.evaluate("""
-                () => {
-                    const links = Array.from(document.querySelectorAll('a[href]'));
-                    return links
-                        .filter(link => {
-                            const text = link.textContent.toLowerCase();
-                            const href = link.href.toLowerCase();
-                            return text.includes('sign up') || text.includes('register') || 
-                                   text.includes('login') || text.includes('sign in') ||
-                                   href.includes('register') || href.includes('login') ||
-                                   href.includes('signup') || href.includes('signin');
-                        })
-                        .map(link => ({
-                            href: link.href,
-                            text: link.textContent.trim()
-                        }));
-                }
-            """)
-            
-            # Ищем кнопки регистрации (могут открывать модальные окна)
-            signup_buttons = await self.browser_tool.page.evaluate("""
-                () => {
-                    const buttons = Array.from(document.querySelectorAll('button, [role="button"], .btn, input[type="button"], a, div[onclick], span[onclick]'));
-                    return buttons
-                        .filter(btn => {
-                            const text = btn.textContent.toLowerCase();
-                            const ariaLabel = (btn.getAttribute('aria-label') || '').toLowerCase();
-                            const dataTestId = (btn.getAttribute('data-testid') || '').toLowerCase();
-                            const className = (btn.className || '').toLowerCase();
-                            const id = (btn.id || '').toLowerCase();
-                            
-                            // Расширенный список ключевых слов для регистрации
-                            const signupKeywords = [
-                                'sign up', 'signup', 'register', 'registration', 'join', 'create account',
-                                'get started', 'start free', 'join now', 'create', 'new account'
-                            ];
-                            
-                            return signupKeywords.some(keyword => 
-                                text.includes(keyword) || 
-                                ariaLabel.includes(keyword) ||
-                                dataTestId.includes(keyword.replace(' ', '')) ||
-                                className.includes(keyword.replace(' ', '')) ||
-                                id.includes(keyword.replace(' ', ''))
-                            );
-                        })
-                        .map(btn => ({
-                            text: btn.textContent.trim(),
-                            tagName: btn.tagName,
-                            className: btn.className,
-                            dataTestId: btn.getAttribute('data-testid') || '',
-                            ariaLabel: btn.getAttribute('aria-label') || '',
-                            id: btn.id || '',
-                            href: btn.href || ''
-                        }));
-                }
-            """)
+            # Ссылки на регистрацию/вход и кнопки регистрации (могут открывать модальные окна)
+            # собираются одним вызовом evaluate
+            auth_elements = await self._run_page_script(page, "authElements")
+            auth_links = auth_elements['links']
+            signup_buttons = auth_elements['buttons']
             
             print(f"🔗 Найдено ссылок на аутентификацию: {len(auth_links)}")
             print(f"🔘 Найдено кнопок регистрации: {len(signup_buttons)}")
@@ -358,147 +974,68 @@ class SmartExplorationAgent:
             # Добавляем диагностику если кнопки не найдены или есть проблемы
             if len(signup_buttons) == 0:
                 print("🔍 Кнопки регистрации не найдены, запускаем диагностику...")
-                await self._debug_page_elements("sign up")
-                await self._debug_page_elements("register")
+                await self._debug_page_elements("sign up", page)
+                await self._debug_page_elements("register", page)
             
             # Пробуем кликнуть по кнопкам регистрации для открытия модальных окон
             for button_info in signup_buttons[:2]:  # Ограничиваем количество
                 try:
                     print(f"🔘 Пробуем кликнуть по кнопке: {button_info['text']}")
                     
-                    # Создаем список селекторов для поиска кнопки
+                    # Создаем список селекторов для поиска кнопки: пары (CSS, текст) в порядке приоритета
                     selectors = []
                     
                     if button_info['text']:
                         # Селекторы по тексту
-                        selectors.extend([
-                            f"button:has-text('{button_info['text']}')",
-                            f"[role='button']:has-text('{button_info['text']}')",
-                            f"div:has-text('{button_info['text']}')",
-                            f"a:has-text('{button_info['text']}')",
-                            f"span:has-text('{button_info['text']}')"
-                        ])
+                        selectors.extend(
+                            (tag, button_info['text'])
+                            for tag in _SIGNUP_TEXT_TAGS
+                        )
                     
                     if button_info['dataTestId']:
-                        selectors.append(f"[data-testid='{button_info['dataTestId']}']")
+                        selectors.append((f"[data-testid={_css_string(button_info['dataTestId'])}]", None))
                     
                     if button_info['ariaLabel']:
-                        selectors.append(f"[aria-label='{button_info['ariaLabel']}']")
+                        selectors.append((f"[aria-label={_css_string(button_info['ariaLabel'])}]", None))
                     
                     if button_info['className']:
                         # Разбиваем классы и создаем селекторы
                         classes = button_info['className'].split()
                         for cls in classes[:3]:  # Берем первые 3 класса
                             if cls:
-                                selectors.append(f".{cls}")
+                                selectors.append((_css_class(cls), None))
                     
                     # Добавляем общие селекторы для кнопок регистрации
-                    selectors.extend([
-                        "[data-testid*='signup']",
-                        "[data-testid*='register']",
-                        "[aria-label*='sign up']",
-                        "[aria-label*='register']",
-                        "button[class*='signup']",
-                        "button[class*='register']",
-                        ".signup-btn",
-                        ".register-btn",
-                        "#signup",
-                        "#register"
-                    ])
-                    
-                    button_clicked = False
+                    selectors.extend(_GENERIC_SIGNUP_SELECTORS)
                     
-                    # Пробуем каждый селектор
-                    for selector in selectors:
-                        try:
-                            # Ищем элемент
-                            elements = await self.browser_tool.page.query_selector_all(selector)
-                            
-                            for element in elements:
-                                try:
-                                    # Проверяем видимость элемента
-                                    is_visible = await element.is_visible()
-                                    is_enabled = await element.is_enabled()
-                                    
-                                    print(f"🔍 Элемент {selector}: видимый={is_visible}, активный={is_enabled}")
-                                    
-                                    if not is_visible:
-                                        # Пробуем прокрутить к элементу
-                                        try:
-                                            await element.scroll_into_view_if_needed()
-                                            await self.browser_tool.page.wait_for_timeout(1000)
-                                            is_visible = await element.is_visible()
-                                            print(f"🔄 После скроллинга: видимый={is_visible}")
-                                        except:
-                                            pass
-                                    
-                                    if is_visible and is_enabled:
-                                        # Обычный клик
-                                        print(f"✅ Кликаем по элементу: {selector}")
-                                        await element.click(timeout=5000)
-                                        button_clicked = True
-                                        break
-                                    elif is_enabled:
-                                        # Принудительный клик если элемент не видим но активен
-                                        print(f"🔧 Принудительный клик по элементу: {selector}")
-                                        await element.click(force=True, timeout=5000)
-                                        button_clicked = True
-                                        break
-                                    else:
-                                        # JavaScript клик как последняя попытка
-                                        print(f"⚡ JavaScript клик по элементу: {selector}")
-                                        await element.evaluate("el => el.click()")
-                                        button_clicked = True
-                                        break
-                                        
-                                except Exception as click_error:
-                                    print(f"⚠️ Ошибка клика по {selector}: {click_error}")
-                                    continue
-                            
-                            if button_clicked:
-                                break
-                                
-                        except Exception as selector_error:
-                            print(f"⚠️ Ошибка селектора {selector}: {selector_error}")
-                            continue
+                    try:
+                        forms_before = await self._forms_state(page)
+                        button_clicked = await self._click_first_match(page, selectors)
+                    except Exception as selector_error:
+                        print(f"⚠️ Ошибка поиска кнопки {button_info['text']}: {selector_error}")
+                        button_clicked = False
                     
                     if not button_clicked:
                         print(f"❌ Не удалось кликнуть ни по одному селектору для кнопки: {button_info['text']}")
                         print("🔍 Запускаем дополнительную диагностику...")
-                        await self._debug_page_elements(button_info['text'] or "sign up")
+                        await self._debug_page_elements(button_info['text'] or "sign up", page)
                         continue
                     
                     # Ждем появления модального окна или новой формы
                     print("⏳ Ждем появления модального окна...")
-                    await self.browser_tool.page.wait_for_timeout(3000)
+                    await self._wait_for_forms_change(page, forms_before, timeout=3000)
                     
-                    # Ищем новые формы, которые могли появиться
-                    modal_forms = await self.browser_tool.page.evaluate("""
-                        () => Array.from(document.querySelectorAll('form')).map((form, index) => {
-                            const inputs = Array.from(form.querySelectorAll('input, select, textarea')).map(input => ({
-                                name: input.name || '',
-                                type: input.type || 'text',
-                                required: input.required || false,
-                                placeholder: input.placeholder || ''
-                            }));
-                            
-                            return {
-                                index: index + 1,
-                                action: form.action || '',
-                                method: form.method || 'GET',
-                                inputs: inputs,
-                                form_text: form.textContent?.trim().substring(0, 200) || '',
-                                nearby_text: form.parentElement?.textContent?.trim().substring(0, 300) || ''
-                            };
-                        })
-                    """)
+                    # Ищем новые формы, которые могли появиться, и переключатели режимов - одним вызовом
+                    modal_state = await self._run_page_script(page, "modalState")
+                    modal_forms = modal_state['forms']
+                    mode_switches = modal_state['switches']
                     
                     print(f"📋 Найдено форм после клика: {len(modal_forms)}")
                     
                     # Проверяем новые формы
                     for form in modal_forms:
-                        purpose = await self._classify_form_purpose(form)
-                        if purpose in ['registration', 'login']:
+                        purpose = self._classify_form_purpose(form)
+                        if purpose in _AUTH_SEARCH_PURPOSES and self._mark_seen(seen, "modal_window", purpose, form):
                             print(f"✅ Найдена форма {purpose} в модальном окне")
                             auth_forms.append({
                                 "form": form,
@@ -512,65 +1049,28 @@ class SmartExplorationAgent:
                         if any(f['purpose'] == 'login' for f in auth_forms if f.get('source_url') == 'modal_window'):
                             print("🔄 Ищем переключатель на регистрацию...")
                             
-                            # Ищем переключатели режимов
-                            mode_switches = await self.browser_tool.page.evaluate("""
-                                () => {
-                                    const elements = Array.from(document.querySelectorAll('button, a, [role="button"], [role="tab"]'));
-                                    return elements
-                                        .filter(el => {
-                                            const text = el.textContent.toLowerCase();
-                                            return text.includes('sign up') || text.includes('register') || 
-                                                   text.includes('create') || text.includes('join');
-                                        })
-                                        .map(el => ({
-                                            text: el.textContent.trim(),
-                                            tagName: el.tagName,
-                                            className: el.className,
-                                            href: el.href || '',
-                                            role: el.getAttribute('role') || ''
-                                        }));
-                                }
-                            """)
-                            
                             # Пробуем переключиться на регистрацию
                             for switch in mode_switches:
-                                if any(keyword in switch['text'].lower() for keyword in ['sign up', 'register', 'create']):
+                                if _SIGNUP_SWITCH_RE.search(switch['text']):
                                     print(f"🔄 Переключаемся на регистрацию: {switch['text']}")
                                     
                                     try:
-                                        switch_selector = f"button:has-text('{switch['text']}')"
-                                        if switch['tagName'] == 'A':
-                                            switch_selector = f"a:has-text('{switch['text']}')"
-                                        
-                                        switch_element = await self.browser_tool.page.query_selector(switch_selector)
-                                        if switch_element:
+                                        # Фильтр локатора по тексту вместо подстановки текста в селектор:
+                                        # кавычки в тексте не ломают поиск
+                                        switch_tag = 'a' if switch['tagName'] == 'A' else 'button'
+                                        switch_element = page.locator(switch_tag).filter(has_text=switch['text']).first
+                                        if await switch_element.count():
+                                            forms_before = await self._forms_state(page)
                                             await switch_element.click()
-                                            await self.browser_tool.page.wait_for_timeout(2000)
+                                            await self._wait_for_forms_change(page, forms_before, timeout=2000)
                                             
                                             # Анализируем формы после переключения
-                                            updated_forms = await self.browser_tool.page.evaluate("""
-                                                () => Array.from(document.querySelectorAll('form')).map((form, index) => {
-                                                    const inputs = Array.from(form.querySelectorAll('input, select, textarea')).map(input => ({
-                                                        name: input.name || '',
-                                                        type: input.type || 'text',
-                                                        required: input.required || false,
-                                                        placeholder: input.placeholder || ''
-                                                    }));
-                                                    
-                                                    return {
-                                                        index: index + 1,
-                                                        action: form.action || '',
-                                                        method: form.method || 'GET',
-                                                        inputs: inputs,
-                                                        form_text: form.textContent?.trim().substring(0, 200) || '',
-                                                        nearby_text: form.parentElement?.textContent?.trim().substring(0, 300) || ''
-                                                    };
-                                                })
-                                            """)
+                                            updated_forms = await self._run_page_script(page, "forms")
                                             
                                             for updated_form in updated_forms:
-                                                updated_purpose = await self._classify_form_purpose(updated_form)
-                                                if updated_purpose == 'registration':
+                                                updated_purpose = self._classify_form_purpose(updated_form)
+                                                if updated_purpose == 'registration' and \
+                                                        self._mark_seen(seen, "modal_window", updated_purpose, updated_form):
                                                     print(f"✅ Найдена форма регистрации после переключения")
                                                     auth_forms.append({
                                                         "form": updated_form,
@@ -587,65 +1087,182 @@ class SmartExplorationAgent:
                                         continue
                         
                         # Закрываем модальное окно если оно есть
-                        try:
-                            close_button = await self.browser_tool.page.query_selector(
-                                "button[aria-label*='close'], button[aria-label*='Close'], .close, [data-testid*='close']"
-                            )
-                            if close_button:
-                                await close_button.click()
-                                await self.browser_tool.page.wait_for_timeout(1000)
-                        except:
-                            pass
+                        await self._close_modal(page)
                 
                 except Exception as e:
                     print(f"⚠️ Ошибка при клике по кнопке {button_info['text']}: {e}")
                     continue
             
-            # Переходим по найденным ссылкам и ищем формы
-            for link in auth_links[:3]:  # Ограничиваем количество
-                try:
-                    await self.browser_tool.page.goto(link['href'])
-                    await self.browser_tool.page.wait_for_load_state("networkidle", timeout=5000)
-                    
-                    page_forms = await self.browser_tool.page.evaluate("""
-                        () => Array.from(document.querySelectorAll('form')).map((form, index) => {
-                            const inputs = Array.from(form.querySelectorAll('input, select, textarea')).map(input => ({
-                                name: input.name || '',
-                                type: input.type || 'text',
-                                required: input.required || false,
-                                placeholder: input.placeholder || ''
-                            }));
-                            
-                            return {
-                                index: index + 1,
-                                action: form.action || '',
-                                method: form.method || 'GET',
-                                inputs: inputs,
-                                form_text: form.textContent?.trim().substring(0, 200) || ''
-                            };
-                        })
-                    """)
-                    
-                    for form in page_forms:
-                        purpose = await self._classify_form_purpose(form)
-                        if purpose in ['registration', 'login']:
-                            auth_forms.append({
-                                "form": form,
-                                "purpose": purpose,
-                                "source_url": link['href'],
-                                "confidence": 0.9
-                            })
-                
-                except Exception as e:
-                    print(f"⚠️ Ошибка при переходе по ссылке {link['href']}: {e}")
+            # Страницы по найденным ссылкам открываются параллельно, каждая в своем контексте
+            links = auth_links[:3]  # Ограничиваем количество
+            results = await asyncio.gather(
+                *(self._scrape_link_forms(link['href']) for link in links), return_exceptions=True
+            )
+            
+            for link, page_forms in zip(links, results):
+                if isinstance(page_forms, Exception):
+                    print(f"⚠️ Ошибка при переходе по ссылке {link['href']}: {page_forms}")
                     continue
+                
+                for form in page_forms:
+                    purpose = self._classify_form_purpose(form)
+                    if purpose in _AUTH_SEARCH_PURPOSES and self._mark_seen(seen, "link", purpose, form):
+                        auth_forms.append({
+                            "form": form,
+                            "purpose": purpose,
+                            "source_url": link['href'],
+                            "confidence": 0.9
+                        })
         
         except Exception as e:
             print(f"⚠️ Ошибка при поиске форм аутентификации: {e}")
         
         return auth_forms
     
-    async def _attempt_registration(self, auth_forms: List[Dict[str, Any]], persona: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    async def _scrape_link_forms(self, href: str) -> List[Dict[str, Any]]:
+        """Собирает формы со страницы по ссылке в отдельном контексте браузера
+        
+        Основная вкладка остается на исходной странице.
+        """
+        
+        async with self.browser_tool.isolated_page() as page:
+            await self._open_form_page(page, href)
+            return await self._run_page_script(page, "forms")
+    
+    async def _open_form_page(self, page: Page, url: str):
+        """Открывает страницу и ждет DOM и первую форму (до 3 с)
+        
+        Полного затихания сети (networkidle) не ждем: страницы с аналитикой
+        до него не доходят, а для работы с формой нужен только DOM.
+        """
+        await page.goto(url, wait_until="domcontentloaded", timeout=Config.PAGE_LOAD_TIMEOUT)
+        try:
+            await page.wait_for_selector("form", state="attached", timeout=3000)
+        except PlaywrightTimeoutError:
+            pass  # Форм на странице может не быть
+    
+    async def _run_page_script(self, page: Page, name: str) -> Any:
+        """Вызывает скрипт из _PAGE_SCRIPTS через init-скрипт вкладки"""
+        result = await page.evaluate(
+            "(name) => window.__aiWebTesterAuth ? window.__aiWebTesterAuth[name]() : null", name
+        )
+        if result is None:
+            # Init-скрипт не сработал (например, страница его перезаписала) - передаем скрипт целиком
+            result = await page.evaluate(self._PAGE_SCRIPTS[name])
+        return result
+    
+    async def _forms_state(self, page: Page) -> str:
+        """Снимок форм на странице: число полей, длина текста и видимость каждой формы"""
+        return await self._run_page_script(page, "formsState")
+    
+    async def _wait_for_forms_change(self, page: Page, state_before: str, timeout: int):
+        """Ждет, пока формы на странице изменятся (появится модальное окно, переключится режим)
+        
+        Возвращается сразу после изменения; если за timeout мс ничего не изменилось,
+        продолжает без ошибки - формы могут быть уже на странице.
+        """
+        try:
+            await page.wait_for_function(
+                "before => (" + _FORMS_STATE_JS + ") !== before", arg=state_before, timeout=timeout
+            )
+        except PlaywrightTimeoutError:
+            pass
+    
+    async def _close_modal(self, page: Page):
+        """Закрывает модальное окно, если на странице есть кнопка закрытия
+        
+        Ждет, пока диалог уйдет из DOM, но не дольше 1.5 с - у окна может не быть role=dialog.
+        """
+        try:
+            close_button = await page.query_selector(
+                "button[aria-label*='close'], button[aria-label*='Close'], .close, [data-testid*='close']"
+            )
+            if close_button:
+                await close_button.click()
+                await page.wait_for_selector("[role='dialog']", state="detached", timeout=1500)
+        except Exception:
+            pass
+    
+    async def _click_first_match(self, page: Page, selectors: List[Tuple[str, Optional[str]]]) -> bool:
+        """Находит элемент по списку селекторов и кликает по нему
+        
+        selectors - пары (CSS-селектор, текст или None) в порядке приоритета.
+        Селекторы разрешаются параллельно и по отдельности: селектор, который страница
+        не принимает, пропускается и не мешает остальным. Видимость и активность всех
+        кандидатов определяются одним вызовом evaluate. Порядок - по приоритету селектора,
+        при равном приоритете видимые и активные элементы идут первыми.
+        Состояние уже известно, поэтому на клик дается 1.5 с: элемент, который не
+        кликается сразу (например, перекрыт), пропускаем и пробуем следующий.
+        """
+        
+        labels = [f"{css}:has-text({_css_string(' '.join(text.split()))})" if text else css for css, text in selectors]
+        matches = await asyncio.gather(
+            *(page.locator(label).element_handles() for label in labels), return_exceptions=True
+        )
+        
+        elements = []
+        ranks = []
+        for rank, (label, found) in enumerate(zip(labels, matches)):
+            if isinstance(found, PlaywrightError):
+                if self.debug:
+                    print(f"⚠️ Селектор {label} не разобран: {found}")
+                continue
+            if isinstance(found, BaseException):
+                raise found
+            elements.extend(found)
+            ranks.extend([rank] * len(found))
+        if not elements:
+            return False
+        
+        states = await page.evaluate(_ELEMENT_STATES_SCRIPT, elements)
+        # Элемент, найденный несколькими селекторами, пробуем один раз - с лучшим приоритетом
+        candidates = [i for i, state in enumerate(states) if state['first'] == i]
+        order = sorted(
+            candidates,
+            key=lambda i: (ranks[i], not (states[i]['visible'] and states[i]['enabled']), not states[i]['enabled'])
+        )
+        
+        for i in order:
+            element, state = elements[i], states[i]
+            selector = labels[ranks[i]]
+            if self.debug:
+                print(f"🔍 Элемент {selector}: видимый={state['visible']}, активный={state['enabled']}")
+            try:
+                if state['visible'] and state['enabled']:
+                    # Обычный клик
+                    print(f"✅ Кликаем по элементу: {selector}")
+                    await element.click(timeout=1500)
+                elif state['enabled']:
+                    # Принудительный клик если элемент не видим но активен (Playwright сам прокрутит к нему)
+                    print(f"🔧 Принудительный клик по элементу: {selector}")
+                    await element.click(force=True, timeout=1500)
+                else:
+                    # JavaScript клик как последняя попытка
+                    print(f"⚡ JavaScript клик по элементу: {selector}")
+                    await element.evaluate("el => el.click()")
+                return True
+            except PlaywrightError as click_error:
+                # Ожидаемо для перекрытых и исчезнувших элементов (TimeoutError - подкласс Error)
+                if self.debug:
+                    print(f"⚠️ Ошибка клика по {selector}: {click_error}")
+        
+        return False
+    
+    async def _attempt_registration_in_context(self, auth_forms: List[Dict[str, Any]], persona: Mapping[str, Any], start_url: str) -> Optional[Dict[str, Any]]:
+        """Попытка регистрации персоны в отдельном контексте браузера
+        
+        У каждой персоны свои cookies и своя вкладка, поэтому попытки
+        разных персон не мешают друг другу и могут идти параллельно.
+        """
+        
+        if not any(f['purpose'] == 'registration' for f in auth_forms):
+            return None
+        
+        async with self.browser_tool.isolated_page() as page:
+            await page.goto(start_url, wait_until="load", timeout=Config.PAGE_LOAD_TIMEOUT)
+            return await self._attempt_registration(auth_forms, persona, page)
+    
+    async def _attempt_registration(self, auth_forms: List[Dict[str, Any]], persona: Mapping[str, Any], page: Optional[Page] = None) -> Optional[Dict[str, Any]]:
         """Попытка регистрации с использованием персоны"""
         
         registration_forms = [f for f in auth_forms if f['purpose'] == 'registration']
@@ -653,6 +1270,8 @@ class SmartExplorationAgent:
         if not registration_forms:
             return None
         
+        page = page or self.browser_tool.page
+        
         print(f"👤 Попытка регистрации как {persona['name']}...")
         
         for form_data in registration_forms:
@@ -666,191 +1285,65 @@ class SmartExplorationAgent:
                 if source_url == "modal_window" and trigger_button:
                     print(f"🔘 Открываем модальное окно через кнопку: {trigger_button}")
                     
-                    # Создаем расширенный список селекторов для кнопки триггера
-                    trigger_selectors = []
-                    
-                    if trigger_button:
-                        trigger_selectors.extend([
-                            f"button:has-text('{trigger_button}')",
-                            f"[role='button']:has-text('{trigger_button}')",
-                            f"div:has-text('{trigger_button}')",
-                            f"a:has-text('{trigger_button}')",
-                            f"span:has-text('{trigger_button}')"
-                        ])
-                    
-                    # Добавляем общие селекторы
-                    trigger_selectors.extend([
-                        "[data-testid*='signup']",
-                        "[data-testid*='register']",
-                        "[aria-label*='sign up']",
-                        "[aria-label*='register']",
-                        "button[class*='signup']",
-                        "button[class*='register']",
-                        ".signup-btn",
-                        ".register-btn",
-                        "#signup",
-                        "#register"
-                    ])
+                    # Кнопка ищется сначала по тексту, затем по общим селекторам регистрации
+                    trigger_selectors = [
+                        (tag, trigger_button)
+                        for tag in _SIGNUP_TEXT_TAGS
+                    ]
+                    trigger_selectors.extend(_GENERIC_SIGNUP_SELECTORS)
                     
-                    button_clicked = False
-                    
-                    for selector in trigger_selectors:
-                        try:
-                            elements = await self.browser_tool.page.query_selector_all(selector)
-                            
-                            for element in elements:
-                                try:
-                                    is_visible = await element.is_visible()
-                                    is_enabled = await element.is_enabled()
-                                    
-                                    print(f"🔍 Триггер {selector}: видимый={is_visible}, активный={is_enabled}")
-                                    
-                                    if not is_visible:
-                                        try:
-                                            await element.scroll_into_view_if_needed()
-                                            await self.browser_tool.page.wait_for_timeout(1000)
-                                            is_visible = await element.is_visible()
-                                            print(f"🔄 После скроллинга: видимый={is_visible}")
-                                        except:
-                                            pass
-                                    
-                                    if is_visible and is_enabled:
-                                        print(f"✅ Кликаем по триггеру: {selector}")
-                                        await element.click(timeout=5000)
-                                        button_clicked = True
-                                        break
-                                    elif is_enabled:
-                                        print(f"🔧 Принудительный клик по триггеру: {selector}")
-                                        await element.click(force=True, timeout=5000)
-                                        button_clicked = True
-                                        break
-                                    else:
-                                        print(f"⚡ JavaScript клик по триггеру: {selector}")
-                                        await element.evaluate("el => el.click()")
-                                        button_clicked = True
-                                        break
-                                        
-                                except Exception as click_error:
-                                    print(f"⚠️ Ошибка клика по триггеру {selector}: {click_error}")
-                                    continue
-                            
-                            if button_clicked:
-                                break
-                                
-                        except Exception as selector_error:
-                            print(f"⚠️ Ошибка селектора триггера {selector}: {selector_error}")
-                            continue
+                    try:
+                        forms_before = await self._forms_state(page)
+                        button_clicked = await self._click_first_match(page, trigger_selectors)
+                    except Exception as selector_error:
+                        print(f"⚠️ Ошибка поиска кнопки триггера {trigger_button}: {selector_error}")
+                        button_clicked = False
                     
                     if not button_clicked:
                         print(f"❌ Не удалось найти или кликнуть кнопку триггер: {trigger_button}")
                         continue
                     
                     # Ждем появления модального окна
-                    await self.browser_tool.page.wait_for_timeout(3000)
+                    await self._wait_for_forms_change(page, forms_before, timeout=3000)
                         
                     # Если есть переключатель, кликаем по нему
                     if switch_button:
                         print(f"🔄 Переключаемся на регистрацию: {switch_button}")
                         
-                        switch_selectors = []
-                        
-                        if switch_button:
-                            switch_selectors.extend([
-                                f"button:has-text('{switch_button}')",
-                                f"a:has-text('{switch_button}')",
-                                f"div:has-text('{switch_button}')",
-                                f"span:has-text('{switch_button}')"
-                            ])
-                        
-                        switch_selectors.extend([
-                            "[data-testid*='switch']",
-                            "[data-testid*='signup']",
-                            "[data-testid*='register']",
-                            "button[class*='switch']",
-                            ".switch-btn"
-                        ])
-                        
-                        switch_clicked = False
+                        switch_selectors = [(tag, switch_button) for tag in _SWITCH_TEXT_TAGS]
+                        switch_selectors.extend(_GENERIC_SWITCH_SELECTORS)
                         
-                        for selector in switch_selectors:
-                            try:
-                                elements = await self.browser_tool.page.query_selector_all(selector)
-                                
-                                for element in elements:
-                                    try:
-                                        is_visible = await element.is_visible()
-                                        is_enabled = await element.is_enabled()
-                                        
-                                        print(f"🔍 Переключатель {selector}: видимый={is_visible}, активный={is_enabled}")
-                                        
-                                        if not is_visible:
-                                            try:
-                                                await element.scroll_into_view_if_needed()
-                                                await self.browser_tool.page.wait_for_timeout(1000)
-                                                is_visible = await element.is_visible()
-                                            except:
-                                                pass
-                                        
-                                        if is_visible and is_enabled:
-                                            print(f"✅ Кликаем по переключателю: {selector}")
-                                            await element.click(timeout=5000)
-                                            switch_clicked = True
-                                            break
-                                        elif is_enabled:
-                                            print(f"🔧 Принудительный клик по переключателю: {selector}")
-                                            await element.click(force=True, timeout=5000)
-                                            switch_clicked = True
-                                            break
-                                        else:
-                                            print(f"⚡ JavaScript клик по переключателю: {selector}")
-                                            await element.evaluate("el => el.click()")
-                                            switch_clicked = True
-                                            break
-                                            
-                                    except Exception as click_error:
-                                        print(f"⚠️ Ошибка клика по переключателю {selector}: {click_error}")
-                                        continue
-                                
-                                if switch_clicked:
-                                    break
-                                    
-                            except Exception as selector_error:
-                                print(f"⚠️ Ошибка селектора переключателя {selector}: {selector_error}")
-                                continue
+                        try:
+                            forms_before = await self._forms_state(page)
+                            switch_clicked = await self._click_first_match(page, switch_selectors)
+                        except Exception as selector_error:
+                            print(f"⚠️ Ошибка поиска переключателя {switch_button}: {selector_error}")
+                            switch_clicked = False
                         
                         if not switch_clicked:
                             print(f"⚠️ Не удалось найти переключатель: {switch_button}")
                             # Продолжаем, возможно форма уже в режиме регистрации
                         else:
-                            # Ждем после переключения
-                            await self.browser_tool.page.wait_for_timeout(2000)
+                            # Ждем, пока форма переключится
+                            await self._wait_for_forms_change(page, forms_before, timeout=2000)
                 
                 elif source_url and source_url != "modal_window":
                     # Переходим на страницу с формой
-                    await self.browser_tool.page.goto(source_url)
-                    await self.browser_tool.page.wait_for_load_state("networkidle", timeout=5000)
+                    await self._open_form_page(page, source_url)
                 
                 # Генерируем уникальные данные для регистрации
                 test_data = self._generate_test_data(persona)
                 
                 # Заполняем форму
-                fill_result = await self._fill_form_intelligently(form, test_data)
+                fill_result = await self._fill_form_intelligently(form, test_data, page)
                 
                 if fill_result['success']:
                     # Пытаемся отправить форму
-                    submit_result = await self._submit_form_safely(form)
+                    submit_result = await self._submit_form_safely(form, page)
                     
                     # Закрываем модальное окно если оно было открыто
                     if source_url == "modal_window":
-                        try:
-                            close_button = await self.browser_tool.page.query_selector(
-                                "button[aria-label*='close'], button[aria-label*='Close'], .close, [data-testid*='close']"
-                            )
-                            if close_button:
-                                await close_button.click()
-                                await self.browser_tool.page.wait_for_timeout(1000)
-                        except:
-                            pass
+                        await self._close_modal(page)
                     
                     return {
                         "persona": persona['name'],
@@ -869,11 +1362,11 @@ class SmartExplorationAgent:
         
         return None
     
-    def _generate_test_data(self, persona: Dict[str, Any]) -> Dict[str, str]:
+    def _generate_test_data(self, persona: Mapping[str, Any]) -> Dict[str, str]:
         """Генерирует тестовые данные на основе персоны"""
         
         timestamp = int(time.time())
-        random_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
+        random_suffix = secrets.token_hex(3)
         
         return {
             "email": f"{persona['email_prefix']}.{timestamp}.{random_suffix}@testmail.com",
@@ -896,41 +1389,62 @@ class SmartExplorationAgent:
             "region": "New York"
         }
     
-    async def _fill_form_intelligently(self, form: Dict[str, Any], test_data: Dict[str, str]) -> Dict[str, Any]:
+    async def _fill_form_intelligently(self, form: Dict[str, Any], test_data: Dict[str, str], page: Optional[Page] = None) -> Dict[str, Any]:
         """Умное заполнение формы на основе анализа полей"""
         
+        page = page or self.browser_tool.page
         filled_fields = []
         errors = []
         
         try:
             inputs = form.get('inputs', [])
             
+            # План заполнения: селектор поля и значение для каждого опознанного поля
+            plan = []
             for input_field in inputs:
                 field_name = input_field.get('name', '').lower()
                 field_type = input_field.get('type', 'text').lower()
                 placeholder = input_field.get('placeholder', '').lower()
                 
+                if field_type in _UNFILLABLE_INPUT_TYPES:
+                    continue
+                
                 # Определяем подходящее значение
-                value = self._match_field_to_data(field_name, field_type, placeholder, test_data)
+                value = self._match_field_to_data(
+                    field_name, field_type, placeholder, test_data, input_field.get('maxLength')
+                )
                 
                 if value:
-                    try:
-                        # Ищем поле на странице и заполняем его
-                        selector = f"input[name='{input_field.get('name')}']"
-                        if not input_field.get('name'):
-                            selector = f"input[type='{field_type}']"
-                        
-                        element = await self.browser_tool.page.query_selector(selector)
-                        if element:
-                            await element.fill(value)
-                            filled_fields.append({
-                                "field": field_name,
-                                "type": field_type,
-                                "value": value[:20] + "..." if len(value) > 20 else value
-                            })
-                        
-                    except Exception as e:
-                        errors.append(f"Ошибка заполнения поля {field_name}: {e}")
+                    selector = f"input[name={_css_string(input_field.get('name'))}]"
+                    if not input_field.get('name'):
+                        selector = f"input[type={_css_string(field_type)}]"
+                    plan.append((selector, value, field_name, field_type))
+            
+            # Все поля заполняются одним вызовом evaluate
+            statuses = await page.evaluate(_FILL_FIELDS_SCRIPT, {
+                "plan": [{"sel": selector, "val": value} for selector, value, _, _ in plan],
+                "skipTypes": sorted(_UNFILLABLE_INPUT_TYPES)
+            }) if plan else []
+            
+            for (selector, value, field_name, field_type), status in zip(plan, statuses):
+                try:
+                    if status in ('missing', 'skipped'):
+                        continue
+                    if status == 'disabled':
+                        errors.append(f"Поле {field_name} недоступно для ввода")
+                        continue
+                    if status == 'rejected':
+                        # Значение не принято (например, поле контролирует фреймворк) - вводим через Playwright
+                        await page.fill(selector, value, timeout=5000)
+                    
+                    filled_fields.append({
+                        "field": field_name,
+                        "type": field_type,
+                        "value": value[:20] + "..." if len(value) > 20 else value
+                    })
+                
+                except Exception as e:
+                    errors.append(f"Ошибка заполнения поля {field_name}: {e}")
             
             return {
                 "success": len(filled_fields) > 0,
@@ -945,85 +1459,58 @@ class SmartExplorationAgent:
                 "errors": [f"Общая ошибка заполнения формы: {e}"]
             }
     
-    def _match_field_to_data(self, field_name: str, field_type: str, placeholder: str, test_data: Dict[str, str]) -> Optional[str]:
-        """Сопоставляет поле формы с подходящими тестовыми данными"""
+    def _match_field_to_data(self, field_name: str, field_type: str, placeholder: str, test_data: Dict[str, str],
+                             max_length: Optional[int] = None) -> Optional[str]:
+        """Сопоставляет поле формы с подходящими тестовыми данными
+        
+        max_length - атрибут maxlength поля: более длинное значение укорачивается,
+        иначе браузер обрежет его сам, а отправка формы заведомо не пройдет.
+        """
         
         # Объединяем все подсказки
         field_hints = f"{field_name} {field_type} {placeholder}".lower()
         
-        # Сопоставление по ключевым словам
-        if any(keyword in field_hints for keyword in ['email', 'e-mail']):
-            return test_data.get('email')
-        elif any(keyword in field_hints for keyword in ['password', 'pass']):
-            if 'confirm' in field_hints or 'repeat' in field_hints:
-                return test_data.get('password_confirm')
-            return test_data.get('password')
-        elif any(keyword in field_hints for keyword in ['username', 'user', 'login']):
-            return test_data.get('username')
-        elif any(keyword in field_hints for keyword in ['first', 'fname']):
-            return test_data.get('first_name')
-        elif any(keyword in field_hints for keyword in ['last', 'lname', 'surname']):
-            return test_data.get('last_name')
-        elif any(keyword in field_hints for keyword in ['name']) and 'user' not in field_hints:
-            return test_data.get('name')
-        elif any(keyword in field_hints for keyword in ['phone', 'tel']):
-            return test_data.get('phone')
-        elif any(keyword in field_hints for keyword in ['address']):
-            return test_data.get('address')
-        elif any(keyword in field_hints for keyword in ['city']):
-            return test_data.get('city')
-        elif any(keyword in field_hints for keyword in ['country']):
-            return test_data.get('country')
-        elif any(keyword in field_hints for keyword in ['company', 'organization']):
-            return test_data.get('company')
-        elif any(keyword in field_hints for keyword in ['age']):
-            return test_data.get('age')
-        elif any(keyword in field_hints for keyword in ['zip', 'postal']):
-            return test_data.get('zip')
-        elif field_type == 'checkbox':
+        # Сопоставление по ключевым словам: первое сработавшее правило
+        for pattern, data_key in _FIELD_RULES:
+            if pattern.search(field_hints):
+                return _fit_max_length(test_data.get(data_key), max_length)
+        
+        if field_type == 'checkbox':
             return None  # Чекбоксы обрабатываем отдельно
         elif field_type == 'text' and not field_name:
             return "Test input"  # Общий текст для неопознанных полей
         
         return None
     
-    async def _submit_form_safely(self, form: Dict[str, Any]) -> Dict[str, Any]:
+    async def _submit_form_safely(self, form: Dict[str, Any], page: Optional[Page] = None) -> Dict[str, Any]:
         """Безопасная отправка формы с анализом результата"""
         
+        page = page or self.browser_tool.page
         try:
-            # Ищем кнопку отправки
-            submit_button = await self.browser_tool.page.query_selector(
-                "input[type='submit'], button[type='submit'], button:has-text('Submit'), button:has-text('Register'), button:has-text('Sign up')"
-            )
+            # Ищем кнопку отправки: первая подходящая в порядке документа
+            submit_button = page.locator(_SUBMIT_BUTTON_SELECTOR).first
             
-            if not submit_button:
+            if not await submit_button.count():
                 return {"success": False, "error": "Submit button not found"}
             
             # Сохраняем текущий URL
-            current_url = self.browser_tool.page.url
+            current_url = page.url
             
             # Нажимаем кнопку отправки
-            await submit_button.click()
+            await submit_button.click(timeout=5000)
             
             # Ждем изменения страницы или появления сообщений
             try:
-                await self.browser_tool.page.wait_for_load_state("networkidle", timeout=10000)
+                await page.wait_for_load_state("networkidle", timeout=10000)
             except:
                 pass  # Таймаут не критичен
             
-            new_url = self.browser_tool.page.url
+            new_url = page.url
             
-            # Анализируем результат
-            page_content = await self.browser_tool.page.content()
-            
-            # Ищем сообщения об ошибках или успехе
-            success_indicators = ['success', 'welcome', 'registered', 'created', 'thank you']
-            error_indicators = ['error', 'invalid', 'failed', 'required', 'already exists']
-            
-            content_lower = page_content.lower()
-            
-            has_success = any(indicator in content_lower for indicator in success_indicators)
-            has_error = any(indicator in content_lower for indicator in error_indicators)
+            # Анализируем результат: сообщения ищутся в видимом тексте прямо на странице
+            messages = await page.evaluate(_SUBMIT_MESSAGES_SCRIPT)
+            has_success = messages['success']
+            has_error = messages['error']
             
             return {
                 "success": has_success and not has_error,
@@ -1048,7 +1535,7 @@ class SmartExplorationAgent:
         for i, form in enumerate(page_info.forms):
             print(f"📝 Анализирую форму {i+1}/{len(page_info.forms)}...")
             
-            form_purpose = await self._classify_form_purpose(form)
+            form_purpose = self._classify_form_purpose(form)
             
             # Генерируем подходящие тестовые данные
             if form_purpose == 'contact':
@@ -1075,14 +1562,9 @@ class SmartExplorationAgent:
     
     def _generate_contact_data(self) -> Dict[str, str]:
         """Генерирует данные для контактных форм"""
-        return {
-            "name": "Test User",
-            "email": f"testcontact.{int(time.time())}@example.com",
-            "subject": "Test inquiry from automated testing",
-            "message": "This is a test message generated by automated testing system. Please ignore.",
-            "phone": "+1234567890",
-            "company": "Test Company"
-        }
+        data = dict(_CONTACT_DATA_TEMPLATE)
+        data["email"] = f"testcontact.{int(time.time())}@example.com"
+        return data
     
     def _generate_search_data(self) -> Dict[str, str]:
         """Генерирует данные для поисковых форм"""
@@ -1095,41 +1577,98 @@ class SmartExplorationAgent:
     
     def _generate_subscription_data(self) -> Dict[str, str]:
         """Генерирует данные для форм подписки"""
-        return {
-            "email": f"testsub.{int(time.time())}@example.com",
-            "newsletter": "true"
-        }
+        data = dict(_SUBSCRIPTION_DATA_TEMPLATE)
+        data["email"] = f"testsub.{int(time.time())}@example.com"
+        return data
     
-    async def _discover_hidden_functionality(self) -> List[Dict[str, Any]]:
+    async def _discover_hidden_functionality(self, page: Optional[Page] = None) -> List[Dict[str, Any]]:
         """Ищет скрытую функциональность на сайте"""
         
+        page = page or self.browser_tool.page
         hidden_features = []
         
         try:
-            # Поиск скрытых элементов
-            hidden_elements = await self.browser_tool.page.evaluate("""
+            # Скрытые элементы, комментарии в HTML и data-атрибуты собираются за один обход DOM
+            scan = await page.evaluate("""
                 () => {
-                    const elements = document.querySelectorAll('*');
                     const hidden = [];
+                    const comments = [];
+                    const dataAttrs = [];
+                    const body = document.body;
+                    // Служебные теги не отображаются никогда - это не скрытая функциональность
+                    const serviceTags = new Set(['SCRIPT', 'STYLE', 'TEMPLATE', 'NOSCRIPT', 'LINK', 'META']);
+                    // Элементы body без явных признаков скрытости - для проверки вычисленных стилей
+                    const candidates = [];
+                    const isHidden = style => style.display === 'none' || style.visibility === 'hidden' || style.opacity === '0';
+                    const addHidden = el => {
+                        if (el.innerHTML.length > 0) {
+                            hidden.push({
+                                tag: el.tagName,
+                                id: el.id || '',
+                                class: el.className || '',
+                                content: el.innerHTML.substring(0, 100)
+                            });
+                        }
+                    };
+                    const walker = document.createTreeWalker(
+                        document.documentElement,
+                        NodeFilter.SHOW_ELEMENT | NodeFilter.SHOW_COMMENT,
+                        null,
+                        false
+                    );
                     
-                    elements.forEach(el => {
-                        const style = window.getComputedStyle(el);
-                        if (style.display === 'none' || style.visibility === 'hidden' || 
-                            style.opacity === '0' || el.hidden) {
-                            if (el.tagName && el.innerHTML.length > 0) {
-                                hidden.push({
-                                    tag: el.tagName,
-                                    id: el.id || '',
-                                    class: el.className || '',
-                                    content: el.innerHTML.substring(0, 100)
+                    let node;
+                    while ((hidden.length < 10 || comments.length < 5 || dataAttrs.length < 10) && (node = walker.nextNode())) {
+                        const inBody = body !== null && body.contains(node);
+                        
+                        if (node.nodeType === Node.COMMENT_NODE) {
+                            // Комментарии ищутся только внутри body
+                            const text = node.nodeValue.trim();
+                            if (comments.length < 5 && text.length > 5 && inBody) {
+                                comments.push(text);
+                            }
+                            continue;
+                        }
+                        
+                        // У CSS нет шаблона для имен атрибутов ([data-*] - ошибка), поэтому атрибуты перебираются
+                        for (const attr of node.attributes) {
+                            if (dataAttrs.length >= 10) {
+                                break;
+                            }
+                            if (attr.name.startsWith('data-')) {
+                                dataAttrs.push({
+                                    element: node.tagName,
+                                    attribute: attr.name,
+                                    value: attr.value
                                 });
                             }
                         }
-                    });
+                        
+                        if (hidden.length >= 10 || !inBody || serviceTags.has(node.tagName)) {
+                            continue;
+                        }
+                        // Сначала дешевые проверки: атрибут hidden и inline-стиль
+                        if (node.hidden || isHidden(node.style)) {
+                            addHidden(node);
+                        } else {
+                            candidates.push(node);
+                        }
+                    }
+                    
+                    // getComputedStyle заставляет браузер вычислять стили, поэтому вызывается,
+                    // только если дешевых проверок не хватило, и лишь до набора 10 элементов
+                    for (let i = 0; i < candidates.length && hidden.length < 10; i++) {
+                        if (isHidden(window.getComputedStyle(candidates[i]))) {
+                            addHidden(candidates[i]);
+                        }
+                    }
                     
-                    return hidden.slice(0, 10); // Ограничиваем количество
+                    return {hidden, comments, dataAttrs};
                 }
             """)
+            hidden_elements = scan['hidden']
+            html_comments = scan['comments']
+            data_attributes = scan['dataAttrs']
             
             if hidden_elements:
                 hidden_features.append({
@@ -1138,57 +1677,12 @@ class SmartExplorationAgent:
                     "elements": hidden_elements
                 })
             
-            # Поиск комментариев в HTML
-            html_comments = await self.browser_tool.page.evaluate("""
-                () => {
-                    const walker = document.createTreeWalker(
-                        document.body,
-                        NodeFilter.SHOW_COMMENT,
-                        null,
-                        false
-                    );
-                    
-                    const comments = [];
-                    let node;
-                    
-                    while (node = walker.nextNode()) {
-                        if (node.nodeValue.trim().length > 5) {
-                            comments.push(node.nodeValue.trim());
-                        }
-                    }
-                    
-                    return comments.slice(0, 5);
-                }
-            """)
-            
             if html_comments:
                 hidden_features.append({
                     "type": "html_comments",
                     "comments": html_comments
                 })
             
-            # Поиск data-атрибутов
-            data_attributes = await self.browser_tool.page.evaluate("""
-                () => {
-                    const elements = document.querySelectorAll('[data-*]');
-                    const dataAttrs = [];
-                    
-                    elements.forEach(el => {
-                        Array.from(el.attributes).forEach(attr => {
-                            if (attr.name.startsWith('data-')) {
-                                dataAttrs.push({
-                                    element: el.tagName,
-                                    attribute: attr.name,
-                                    value: attr.value
-                                });
-                            }
-                        });
-                    });
-                    
-                    return dataAttrs.slice(0, 10);
-                }
-            """)
-            
             if data_attributes:
                 hidden_features.append({
                     "type": "data_attributes",
@@ -1206,95 +1700,118 @@ class SmartExplorationAgent:
     async def _analyze_user_flows(self, page_info: PageInfo, max_depth: int) -> List[Dict[str, Any]]:
         """Анализирует возможные пользовательские потоки"""
         
-        user_flows = []
-        
-        # Анализируем основные ссылки для построения потоков
-        main_links = page_info.links[:10]  # Ограничиваем количество
+        # Анализируем основные ссылки для построения потоков: первые 10 разных адресов
+        # (ссылки из меню и подвала часто повторяются, а каждая трассировка - это навигация)
+        flow_links = []
+        seen = set()
+        for link in page_info.links:
+            if not link.startswith('http') or 'javascript:' in link:
+                continue
+            key = _flow_url_key(link)
+            if key not in seen:
+                seen.add(key)
+                flow_links.append(link)
+                if len(flow_links) >= 10:  # Ограничиваем количество
+                    break
+        
+        # Страницы одного шаблона (/product/1, /product/2) дают одинаковую картину,
+        # поэтому трассируется только первая ссылка каждого шаблона
+        templates = [_flow_template_key(link) for link in flow_links]
+        traced_links = {}
+        for template, link in zip(templates, flow_links):
+            traced_links.setdefault(template, link)
+        
+        # Каждая ссылка открывается в своем контексте браузера, поэтому потоки
+        # отслеживаются параллельно (число контекстов ограничено в isolated_page)
+        results = await asyncio.gather(
+            *(self._trace_user_flow_in_context(link, max_depth=2) for link in traced_links.values()),
+            return_exceptions=True
+        )
+        results_by_template = {
+            template: flow_result
+            for template, flow_result in zip(traced_links, results)
+            if flow_result and not isinstance(flow_result, Exception)
+        }
         
-        for link in main_links:
-            try:
-                if link.startswith('http') and 'javascript:' not in link:
-                    flow_result = await self._trace_user_flow(link, max_depth=2)
-                    if flow_result:
-                        user_flows.append(flow_result)
-            except Exception as e:
+        user_flows = []
+        for template, link in zip(templates, flow_links):
+            flow_result = results_by_template.get(template)
+            if flow_result is None:
                 continue
+            if traced_links[template] == link:
+                user_flows.append(flow_result)
+            else:
+                # Результат страницы того же шаблона
+                user_flows.append({**flow_result, "start_url": link, "cached": True})
         
         return user_flows
     
-    async def _trace_user_flow(self, start_url: str, max_depth: int) -> Optional[Dict[str, Any]]:
+    async def _trace_user_flow_in_context(self, start_url: str, max_depth: int) -> Optional[Dict[str, Any]]:
+        """Отслеживает пользовательский поток в отдельном контексте браузера
+        
+        Время трассировки ограничено Config.USER_FLOW_TIMEOUT (без учета ожидания
+        свободного контекста), чтобы одна зависшая страница не задерживала весь анализ.
+        """
+        
+        async with self.browser_tool.isolated_page() as page:
+            return await asyncio.wait_for(
+                self._trace_user_flow(start_url, max_depth, page), timeout=Config.USER_FLOW_TIMEOUT
+            )
+    
+    async def _trace_user_flow(self, start_url: str, max_depth: int, page: Optional[Page] = None) -> Optional[Dict[str, Any]]:
         """Отслеживает пользовательский поток начиная с URL"""
         
+        page = page or self.browser_tool.page
         try:
-            await self.browser_tool.page.goto(start_url)
-            await self.browser_tool.page.wait_for_load_state("networkidle", timeout=5000)
+            # Нужен только DOM: ждем его и первый интерактивный элемент (до 1.5 с), а не затихания сети
+            await page.goto(start_url, wait_until="domcontentloaded", timeout=8000)
+            try:
+                await page.wait_for_selector('button, a[href]', state="attached", timeout=1500)
+            except PlaywrightTimeoutError:
+                pass  # Интерактивных элементов может не быть - собираем то, что есть
             
-            page_title = await self.browser_tool.page.title()
-            
-            # Ищем интерактивные элементы
-            interactive_elements = await self.browser_tool.page.evaluate("""
-                () => {
-                    const buttons = Array.from(document.querySelectorAll('button, input[type="button"], input[type="submit"]'));
-                    const links = Array.from(document.querySelectorAll('a[href]')).slice(0, 5);
-                    
-                    return {
-                        buttons: buttons.map(btn => ({
-                            text: btn.textContent?.trim() || btn.value || '',
-                            type: btn.type || 'button'
-                        })).slice(0, 3),
-                        links: links.map(link => ({
-                            text: link.textContent?.trim() || '',
-                            href: link.href
-                        }))
-                    };
-                }
-            """)
+            # Заголовок страницы и интерактивные элементы - одним вызовом
+            probe = await page.evaluate(_FLOW_PROBE_SCRIPT)
             
             return {
                 "start_url": start_url,
-                "page_title": page_title,
-                "interactive_elements": interactive_elements,
+                "page_title": probe['title'],
+                "interactive_elements": {"buttons": probe['buttons'], "links": probe['links']},
                 "depth_explored": 1
             }
         
         except Exception as e:
             return None
     
-    async def _security_analysis(self) -> List[Dict[str, Any]]:
-        """Анализ безопасности сайта"""
+    async def _collect_page_diagnostics(self, page: Optional[Page] = None) -> Dict[str, Any]:
+        """Собирает данные для анализа безопасности и производительности одним вызовом evaluate
+        
+        Заголовки берутся из ответа, полученного браузером при навигации; повторный
+        запрос к странице делается, только если этого ответа нет (например, после смены URL без навигации).
+        """
+        page = page or self.browser_tool.page
+        headers = self.browser_tool.document_headers.get(page.url)
+        diagnostics = await page.evaluate(_PAGE_DIAGNOSTICS_SCRIPT, headers is None)
+        if headers is not None:
+            diagnostics['headers'] = headers
+        return diagnostics
+    
+    async def _security_analysis(self, diagnostics: Optional[Dict[str, Any]] = None, page: Optional[Page] = None) -> List[Dict[str, Any]]:
+        """Анализ безопасности сайта
+        
+        diagnostics - результат _collect_page_diagnostics; если не передан, собирается заново с page.
+        """
         
         security_findings = []
         
         try:
-            # Проверка заголовков безопасности
-            response = await self.browser_tool.page.evaluate("""
-                async () => {
-                    try {
-                        const response = await fetch(window.location.href);
-                        const headers = {};
-                        for (let [key, value] of response.headers.entries()) {
-                            headers[key] = value;
-                        }
-                        return headers;
-                    } catch (e) {
-                        return {};
-                    }
-                }
-            """)
+            diagnostics = diagnostics or await self._collect_page_diagnostics(page)
             
-            # Проверяем важные заголовки безопасности
-            security_headers = [
-                'x-frame-options',
-                'x-content-type-options',
-                'x-xss-protection',
-                'strict-transport-security',
-                'content-security-policy'
-            ]
+            # Проверка заголовков безопасности
+            response = diagnostics['headers']
             
-            missing_headers = []
-            for header in security_headers:
-                if header not in response:
-                    missing_headers.append(header)
+            # Проверяем важные заголовки безопасности (имена заголовков не зависят от регистра)
+            missing_headers = sorted(_SECURITY_HEADERS - {header.lower() for header in response})
             
             if missing_headers:
                 security_findings.append({
@@ -1304,15 +1821,7 @@ class SmartExplorationAgent:
                 })
             
             # Проверка на наличие форм без CSRF защиты
-            forms_without_csrf = await self.browser_tool.page.evaluate("""
-                () => {
-                    const forms = Array.from(document.querySelectorAll('form'));
-                    return forms.filter(form => {
-                        const csrfInput = form.querySelector('input[name*="csrf"], input[name*="token"]');
-                        return !csrfInput && form.method.toLowerCase() === 'post';
-                    }).length;
-                }
-            """)
+            forms_without_csrf = diagnostics['forms_without_csrf']
             
             if forms_without_csrf > 0:
                 security_findings.append({
@@ -1329,24 +1838,16 @@ class SmartExplorationAgent:
         
         return security_findings
     
-    async def _performance_analysis(self) -> Dict[str, Any]:
-        """Анализ производительности"""
+    async def _performance_analysis(self, diagnostics: Optional[Dict[str, Any]] = None, page: Optional[Page] = None) -> Dict[str, Any]:
+        """Анализ производительности
+        
+        diagnostics - результат _collect_page_diagnostics; если не передан, собирается заново с page.
+        """
         
         try:
-            # Получаем метрики производительности
-            performance_metrics = await self.browser_tool.page.evaluate("""
-                () => {
-                    const navigation = performance.getEntriesByType('navigation')[0];
-                    const resources = performance.getEntriesByType('resource');
-                    
-                    return {
-                        page_load_time: navigation ? navigation.loadEventEnd - navigation.fetchStart : 0,
-                        dom_content_loaded: navigation ? navigation.domContentLoadedEventEnd - navigation.fetchStart : 0,
-                        resources_count: resources.length,
-                        largest_resource: resources.length > 0 ? Math.max(...resources.map(r => r.transferSize || 0)) : 0
-                    };
-                }
-            """)
+            # Метрики производительности
+            diagnostics = diagnostics or await self._collect_page_diagnostics(page)
+            performance_metrics = diagnostics['performance']
             
             return {
                 "metrics": performance_metrics,
@@ -1362,78 +1863,28 @@ class SmartExplorationAgent:
     def _generate_performance_recommendations(self, metrics: Dict[str, Any]) -> List[str]:
         """Генерирует рекомендации по производительности"""
         
-        recommendations = []
-        
-        if metrics.get('page_load_time', 0) > 3000:
-            recommendations.append("Page load time is over 3 seconds - consider optimization")
-        
-        if metrics.get('resources_count', 0) > 50:
-            recommendations.append("High number of resources - consider bundling and minification")
-        
-        if metrics.get('largest_resource', 0) > 1000000:  # 1MB
-            recommendations.append("Large resources detected - consider compression and lazy loading")
-        
-        return recommendations
+        return [message for metric, threshold, message in _PERFORMANCE_RULES if metrics.get(metric, 0) > threshold]
     
     async def _save_exploration_report(self, report: Dict[str, Any]):
         """Сохраняет отчет об исследовании"""
         
-        os.makedirs("exploration_reports", exist_ok=True)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"exploration_reports/smart_exploration_{timestamp}.json"
+        filename = f"exploration_reports/smart_exploration_{time.strftime('%Y%m%d_%H%M%S')}.json"
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        # orjson, если установлен (см. json_utils); отступы - по настройке отчетов
+        data = dumps_bytes(report, pretty=Config.REPORTS_PRETTY_JSON)
+        # Создание директории и запись файла идут в отдельном потоке, не блокируя event loop
+        await asyncio.get_running_loop().run_in_executor(None, _write_report_file, filename, data)
         
         print(f"💾 Отчет сохранен: {filename}")
     
-    async def _debug_page_elements(self, search_text: str = "sign up") -> None:
+    async def _debug_page_elements(self, search_text: str = "sign up", page: Optional[Page] = None) -> None:
         """Отладочный метод для анализа элементов на странице"""
+        page = page or self.browser_tool.page
         try:
             print(f"🔍 Диагностика элементов с текстом '{search_text}'...")
             
-            # Получаем информацию о всех потенциальных кнопках
-            elements_info = await self.browser_tool.page.evaluate(f"""
-                (searchText) => {{
-                    const elements = Array.from(document.querySelectorAll('*'));
-                    const matches = elements.filter(el => {{
-                        const text = el.textContent?.toLowerCase() || '';
-                        const ariaLabel = (el.getAttribute('aria-label') || '').toLowerCase();
-                        const dataTestId = (el.getAttribute('data-testid') || '').toLowerCase();
-                        return text.includes(searchText.toLowerCase()) || 
-                               ariaLabel.includes(searchText.toLowerCase()) ||
-                               dataTestId.includes('signup') || dataTestId.includes('register');
-                    }});
-                    
-                    return matches.slice(0, 10).map(el => {{
-                        const rect = el.getBoundingClientRect();
-                        const style = window.getComputedStyle(el);
-                        
-                        return {{
-                            tagName: el.tagName,
-                            text: el.textContent?.trim().substring(0, 50) || '',
-                            className: el.className || '',
-                            id: el.id || '',
-                            dataTestId: el.getAttribute('data-testid') || '',
-                            ariaLabel: el.getAttribute('aria-label') || '',
-                            visible: rect.width > 0 && rect.height > 0,
-                            display: style.display,
-                            visibility: style.visibility,
-                            opacity: style.opacity,
-                            zIndex: style.zIndex,
-                            position: style.position,
-                            top: rect.top,
-                            left: rect.left,
-                            width: rect.width,
-                            height: rect.height,
-                            inViewport: rect.top >= 0 && rect.left >= 0 && 
-                                       rect.bottom <= window.innerHeight && 
-                                       rect.right <= window.innerWidth
-                        }};
-                    }});
-                }}
-            """, search_text)
+            # Получаем информацию о потенциальных кнопках
+            elements_info = await page.evaluate(_DEBUG_ELEMENTS_SCRIPT, search_text)
             
             print(f"📊 Найдено {len(elements_info)} потенциальных элементов:")
             for i, info in enumerate(elements_info):
@@ -40,9 +40,10 @@ async def test_button_clicking():
         # Тестируем регистрацию
         if auth_forms:
             print("\n👤 Тестируем регистрацию...")
-            personas = agent._create_user_personas()
+            # Персоны общие для всех агентов и создаются один раз при импорте
+            personas = agent.user_personas[:1]  # Тестируем только первую персону
             
-            for persona in personas[:1]:  # Тестируем только первую персону
+            for persona in personas:
                 result = await agent._attempt_registration(auth_forms, persona)
                 if result:
                     print(f"✅ Регистрация {persona['name']}: успешно")
@@ -320,7 +320,7 @@ Include type hints where appropriate.
             HumanMessage(content=prompt)
         ]
         
-        response = self.llm.invoke(messages)
+        response = await self.llm.ainvoke(messages)
         test_code = response.content
         
         # Clean up the response to extract just the Python code